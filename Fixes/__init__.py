@@ -0,0 +1 @@
+"""PDF processing helpers (convert_to_pdf.PDFProcessor)"""
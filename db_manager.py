@@ -1,78 +1,388 @@
 import sqlite3
 import os
 import datetime
+import time
+import threading
+import queue
+import pathlib
+import contextlib
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+# sqlite3 keeps an LRU of compiled statements per connection, keyed by the
+# exact SQL text.  Every statement used on a hot path lives here as a
+# constant so repeated calls hit that cache instead of re-preparing.  The
+# constants below come to 25 distinct statements, and since reads and writes
+# use separate connections each one only ever prepares its own share (12
+# SELECTs on a reader, 13 on the writer, including the message insert and
+# all 8 progress/status updates).  32 keeps every one of them resident
+# for the life of a connection with room to spare; a larger cache would only
+# hold one-off PRAGMA/DDL text.
+STATEMENT_CACHE_SIZE = 32
+
+# Read-only connections kept open for concurrent readers; all writes go
+# through one shared writer connection.
+READ_POOL_SIZE = 4
+
+# Intermediate "in_progress" updates are held in memory and written at most
+# this often (seconds); status transitions are always written immediately.
+PROGRESS_FLUSH_INTERVAL = 0.5
+
+# How long (seconds) QueuedDBWriter keeps collecting updates after the first
+# one arrives before writing them out
+DB_WRITE_BATCH_WINDOW = 0.1
+
+# Rows pulled per fetchmany() call by the streaming readers
+FETCH_BATCH_SIZE = 512
+
+# Bump whenever SQL_CREATE_SCHEMA changes; databases stamped with this
+# version (PRAGMA user_version) skip the DDL on startup.
+SCHEMA_VERSION = 2
+
+# Per-connection settings, applied in one call right after connecting.
+# journal_mode is persistent and only set once, on the writer.
+SQL_CONFIGURE_CONNECTION = '''
+    -- NORMAL only fsyncs at WAL checkpoints instead of on every commit
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    -- 64 MiB page cache (negative values are KiB)
+    PRAGMA cache_size = -65536;
+    -- 256 MiB
+    PRAGMA mmap_size = 268435456;
+    -- Required for the ON DELETE CASCADE clauses in the schema
+    PRAGMA foreign_keys = ON;
+'''
+
+SQL_CREATE_SCHEMA = '''
+    -- Knowledge Base table
+    CREATE TABLE IF NOT EXISTS knowledge_bases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        directory TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Document Files table
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kb_id INTEGER NOT NULL,
+        original_filename TEXT NOT NULL,
+        original_path TEXT NOT NULL,
+        converted_path TEXT,
+        is_scanned BOOLEAN DEFAULT FALSE,
+        conversion_status TEXT DEFAULT 'pending',  -- pending, in_progress, completed, failed
+        conversion_progress REAL DEFAULT 0,
+        page_count INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (kb_id) REFERENCES knowledge_bases(id) ON DELETE CASCADE
+    );
+
+    -- Conversation history table
+    CREATE TABLE IF NOT EXISTS conversations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        conversation_id TEXT UNIQUE NOT NULL,
+        data_element TEXT NOT NULL,
+        procedure TEXT NOT NULL,
+        kb_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (kb_id) REFERENCES knowledge_bases(id) ON DELETE CASCADE
+    );
+
+    -- Messages in conversations. conversation_id is the integer
+    -- conversations.id; the TEXT conversations.conversation_id is only the
+    -- external handle, so it is not repeated in every message row and index.
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        conversation_id INTEGER NOT NULL,
+        is_user BOOLEAN NOT NULL,  -- TRUE if from user, FALSE if from system
+        message TEXT NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+    );
+
+    -- Indexes for the hot lookups (knowledge_bases.name is already covered
+    -- by its UNIQUE constraint)
+    CREATE INDEX IF NOT EXISTS idx_documents_kb ON documents(kb_id);
+    -- Partial index holding exactly the rows get_pending_conversions wants
+    CREATE INDEX IF NOT EXISTS idx_documents_pending ON documents(conversion_status)
+        WHERE is_scanned = TRUE AND conversion_status = 'pending';
+    -- Matches both the WHERE and the ORDER BY of get_conversation_messages
+    CREATE INDEX IF NOT EXISTS idx_messages_conv ON messages(conversation_id, timestamp);
+'''
+
+# Schema version 1 keyed messages by the TEXT conversation_id. Set the old
+# table aside (its index name would otherwise block the new one), let
+# SQL_CREATE_SCHEMA build the current layout, then copy the rows across.
+# Foreign keys were not enforced back then, so a message may point at a
+# conversation that does not exist. Such rows cannot get an integer key;
+# they are kept in messages_orphaned rather than dropped.
+SQL_MIGRATE_MESSAGES_PRE = '''
+    DROP INDEX IF EXISTS idx_messages_conv;
+    ALTER TABLE messages RENAME TO messages_v1;
+'''
+SQL_MIGRATE_MESSAGES_POST = '''
+    INSERT INTO messages (id, conversation_id, is_user, message, timestamp)
+        SELECT m.id, c.id, m.is_user, m.message, m.timestamp
+        FROM messages_v1 m
+        JOIN conversations c ON c.conversation_id = m.conversation_id;
+'''
+SQL_MIGRATE_MESSAGES_DROP_OLD = '''
+    DROP TABLE messages_v1;
+'''
+SQL_MIGRATE_MESSAGES_KEEP_ORPHANS = '''
+    DELETE FROM messages_v1
+        WHERE conversation_id IN (SELECT conversation_id FROM conversations);
+    ALTER TABLE messages_v1 RENAME TO messages_orphaned;
+'''
+SQL_COUNT_ORPHANED_MESSAGES = """
+    SELECT COUNT(*) FROM messages m
+    WHERE NOT EXISTS (
+        SELECT 1 FROM conversations c WHERE c.conversation_id = m.conversation_id
+    )
+"""
+SQL_MESSAGES_CONVERSATION_ID_TYPE = (
+    "SELECT type FROM pragma_table_info('messages') WHERE name = 'conversation_id'"
+)
+
+SQL_INSERT_KB = "INSERT INTO knowledge_bases (name, directory) VALUES (?, ?)"
+SQL_GET_KB_ID = "SELECT id FROM knowledge_bases WHERE name = ?"
+SQL_GET_KB_BY_ID = "SELECT * FROM knowledge_bases WHERE id = ?"
+SQL_GET_KB_BY_NAME = "SELECT * FROM knowledge_bases WHERE name = ?"
+SQL_GET_ALL_KBS = "SELECT id, name, directory, created_at FROM knowledge_bases ORDER BY name"
+
+SQL_INSERT_DOC = """
+    INSERT INTO documents
+        (kb_id, original_filename, original_path, is_scanned, conversion_status)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SQL_GET_DOCS_BY_KB = """
+    SELECT id, original_filename, original_path, converted_path,
+           is_scanned, conversion_status, conversion_progress, page_count
+    FROM documents
+    WHERE kb_id = ?
+    ORDER BY original_filename
+"""
+# A document is only marked completed together with its converted_path
+# (see update_document_conversion callers), so the status alone says which
+# copy to serve
+SQL_GET_KB_FILE_PATHS = """
+    SELECT CASE
+               WHEN conversion_status = 'completed' AND converted_path IS NOT NULL
+               THEN converted_path
+               ELSE original_path
+           END
+    FROM documents
+    WHERE kb_id = ?
+    ORDER BY original_filename
+"""
+SQL_GET_DOC_BY_ID = """
+    SELECT id, kb_id, original_filename, original_path, converted_path,
+           is_scanned, conversion_status, conversion_progress, page_count
+    FROM documents
+    WHERE id = ?
+"""
+SQL_GET_ALL_DOCS_WITH_KB = """
+    SELECT k.id AS kb_id, k.name AS kb_name,
+           d.id, d.original_filename, d.original_path, d.converted_path,
+           d.is_scanned, d.conversion_status, d.conversion_progress, d.page_count
+    FROM knowledge_bases k
+    LEFT JOIN documents d ON d.kb_id = k.id
+    ORDER BY k.name, d.original_filename
+"""
+SQL_GET_PENDING_CONVERSIONS = """
+    SELECT d.id, d.original_filename, d.original_path, k.name as kb_name
+    FROM documents d
+    JOIN knowledge_bases k ON d.kb_id = k.id
+    WHERE d.is_scanned = TRUE AND d.conversion_status = 'pending'
+"""
+SQL_GET_CONVERTIBLE_DOCS_WITH_KB = """
+    SELECT d.id, d.original_path, k.directory
+    FROM documents d
+    JOIN knowledge_bases k ON d.kb_id = k.id
+    WHERE k.name = ? AND d.is_scanned = TRUE
+      AND d.conversion_status IN ('pending', 'failed')
+    ORDER BY d.original_filename
+"""
+
+# update_document_conversion only touches the optional columns it was given.
+# Precompute one statement per combination, keyed by
+# (progress given, converted_path given, page_count given).
+SQL_UPDATE_DOC = {
+    (has_progress, has_path, has_pages): (
+        "UPDATE documents SET conversion_status = ?"
+        + (", conversion_progress = ?" if has_progress else "")
+        + (", converted_path = ?" if has_path else "")
+        + (", page_count = ?" if has_pages else "")
+        + " WHERE id = ?"
+    )
+    for has_progress in (False, True)
+    for has_path in (False, True)
+    for has_pages in (False, True)
+}
+SQL_UPDATE_DOC_STATUS_ONLY = SQL_UPDATE_DOC[(False, False, False)]
+SQL_UPDATE_DOC_PROGRESS = SQL_UPDATE_DOC[(True, False, False)]
+SQL_UPDATE_DOC_FULL = SQL_UPDATE_DOC[(True, True, True)]
+SQL_GET_DOC_PROGRESS = "SELECT conversion_progress FROM documents WHERE id = ?"
+
+SQL_INSERT_CONVERSATION = "INSERT INTO conversations (conversation_id, data_element, procedure, kb_id) VALUES (?, ?, ?, ?)"
+SQL_GET_CONVERSATION_PK = "SELECT id FROM conversations WHERE conversation_id = ?"
+SQL_INSERT_MESSAGE = "INSERT INTO messages (conversation_id, is_user, message) VALUES (?, ?, ?)"
+SQL_GET_CONVERSATION_MESSAGES = """
+    SELECT m.is_user, m.message, m.timestamp
+    FROM conversations c
+    JOIN messages m ON m.conversation_id = c.id
+    WHERE c.conversation_id = ?
+    ORDER BY m.timestamp
+"""
+
+
+def _iter_dicts(cursor, size=FETCH_BATCH_SIZE):
+    """Yield the rows of an executed cursor as dicts, a batch at a time"""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(row)
+
 
 class DBManager:
     """
     Database manager for tracking knowledge bases, files and conversion status
     """
-    def __init__(self, db_path="app_data.db"):
+    def __init__(self, db_path="app_data.db", read_pool_size=READ_POOL_SIZE):
         """Initialize database connection and create tables if they don't exist"""
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-        self.cursor = self.conn.cursor()
+        # SQLite allows a single writer at a time, so every write shares one
+        # connection behind a lock instead of contending with SQLITE_BUSY
+        self._write_conn = self._connect(db_path)
+        self._write_lock = threading.RLock()
+        # Bumped after every committed write (and buffered progress tick) so
+        # callers can cache query results until the data actually changes.
+        # Each bump takes the next value of a shared counter, which needs no
+        # lock, so a buffered tick never waits on a commit.
+        self._versions = itertools.count(1)
+        self.data_version = 0
+        # The journal mode is stored in the database file, so switching it
+        # once on the writer covers the readers as well. In-memory
+        # databases cannot use WAL, so leave their journal alone.
+        if db_path != ":memory:":
+            self._write_conn.execute("PRAGMA journal_mode=WAL")
         self._create_tables()
-    
-    def _create_tables(self):
-        """Create required tables if they don't exist"""
-        # Knowledge Base table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS knowledge_bases (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            directory TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
         
-        # Document Files table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS documents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            kb_id INTEGER NOT NULL,
-            original_filename TEXT NOT NULL,
-            original_path TEXT NOT NULL,
-            converted_path TEXT,
-            is_scanned BOOLEAN DEFAULT FALSE,
-            conversion_status TEXT DEFAULT 'pending',  -- pending, in_progress, completed, failed
-            conversion_progress REAL DEFAULT 0,
-            page_count INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (kb_id) REFERENCES knowledge_bases(id) ON DELETE CASCADE
-        )
-        ''')
+        # Readers are opened read-only once the schema exists and checked out
+        # per call, so concurrent reads never queue behind the write lock.
+        # Every ":memory:" connection is a separate database, so there the
+        # writer serves reads as well.
+        self._read_pool = None
+        if db_path != ":memory:":
+            self._read_pool = queue.Queue()
+            uri = pathlib.Path(db_path).absolute().as_uri() + "?mode=ro"
+            for _ in range(read_pool_size):
+                self._read_pool.put(self._connect(uri, uri=True))
         
-        # Conversation history table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS conversations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            conversation_id TEXT UNIQUE NOT NULL,
-            data_element TEXT NOT NULL, 
-            procedure TEXT NOT NULL,
-            kb_id INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (kb_id) REFERENCES knowledge_bases(id) ON DELETE CASCADE
+        # Write-behind buffer for conversion progress: doc_id -> (status, progress)
+        self._progress_buf = {}
+        # Documents whose "in_progress" status has already been stored
+        self._converting = set()
+        # Guards the buffer; only ever held for dict/set updates, so readers
+        # merging buffered progress never wait on a commit
+        self._progress_lock = threading.Lock()
+        # Held around each flush or direct status write, SQL included, so a
+        # flush can never land after a later status transition
+        self._flush_lock = threading.Lock()
+        self._flush_stop = threading.Event()
+        self._flush_thread = None
+
+    def _connect(self, database, uri=False):
+        """Open a connection shared across threads under the pool's locking"""
+        conn = sqlite3.connect(
+            database, uri=uri, cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=False
         )
-        ''')
+        # Rows support both index and key access, so getters can hand
+        # them to dict() without building each mapping in Python
+        conn.row_factory = sqlite3.Row
+        self._configure_connection(conn)
+        return conn
+
+    @contextlib.contextmanager
+    def _reader(self):
+        """Check a read-only connection out of the pool for the duration of a block"""
+        if self._read_pool is None:
+            with self._write_lock:
+                yield self._write_conn
+            return
         
-        # Messages in conversations
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            conversation_id TEXT NOT NULL,
-            is_user BOOLEAN NOT NULL,  -- TRUE if from user, FALSE if from system
-            message TEXT NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (conversation_id) REFERENCES conversations(conversation_id) ON DELETE CASCADE
-        )
-        ''')
+        conn = self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+
+    @contextlib.contextmanager
+    def _writer(self):
+        """Hold the writer connection in a transaction for the duration of a block"""
+        with self._write_lock:
+            with self._write_conn:
+                yield self._write_conn
+            self.data_version = next(self._versions)
+
+    def _configure_connection(self, conn):
+        """Apply durability and cache PRAGMAs to a new connection"""
+        conn.executescript(SQL_CONFIGURE_CONNECTION)
+
+    def _create_tables(self):
+        """Create required tables and indexes unless the schema is already current"""
+        conn = self._write_conn
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        # Older databases (including unversioned ones) may still have TEXT
+        # message keys
+        legacy = conn.execute(SQL_MESSAGES_CONVERSATION_ID_TYPE).fetchone()
+        migrate = legacy is not None and legacy[0].upper() == "TEXT"
+        orphans = 0
+        if migrate:
+            orphans = conn.execute(SQL_COUNT_ORPHANED_MESSAGES).fetchone()[0]
+            if orphans:
+                logger.warning(
+                    "Keeping %d message(s) without a conversation in messages_orphaned",
+                    orphans
+                )
         
-        self.conn.commit()
+        # One script instead of a prepare/step/finalize per statement; the
+        # migration and version bump are part of the same transaction
+        conn.executescript(
+            "BEGIN;"
+            + (SQL_MIGRATE_MESSAGES_PRE if migrate else "")
+            + SQL_CREATE_SCHEMA
+            + (SQL_MIGRATE_MESSAGES_POST if migrate else "")
+            + ((SQL_MIGRATE_MESSAGES_KEEP_ORPHANS if orphans else SQL_MIGRATE_MESSAGES_DROP_OLD)
+               if migrate else "")
+            + f"PRAGMA user_version = {SCHEMA_VERSION};"
+            + "COMMIT;"
+            + "ANALYZE;"
+        )
     
     def close(self):
-        """Close the database connection"""
-        if self.conn:
-            self.conn.close()
+        """Flush buffered progress and close the database connection"""
+        if self._flush_thread is not None:
+            self._flush_stop.set()
+            self._flush_thread.join()
+            self._flush_thread = None
+        self.flush_progress()
+        with self._write_lock:
+            self._write_conn.close()
+        if self._read_pool is not None:
+            while True:
+                try:
+                    self._read_pool.get_nowait().close()
+                except queue.Empty:
+                    break
     
     def add_knowledge_base(self, name, directory):
         """
@@ -86,54 +396,38 @@ class DBManager:
             int: ID of the created knowledge base or None if error
         """
         try:
-            self.cursor.execute(
-                "INSERT INTO knowledge_bases (name, directory) VALUES (?, ?)",
-                (name, directory)
-            )
-            self.conn.commit()
-            return self.cursor.lastrowid
+            with self._writer() as conn:
+                cur = conn.execute(SQL_INSERT_KB, (name, directory))
+            return cur.lastrowid
         except sqlite3.IntegrityError:
             # Name already exists
             return None
-        except Exception as e:
-            print(f"Error adding knowledge base: {e}")
+        except Exception:
+            logger.exception("Error adding knowledge base")
             return None
     
     def get_knowledge_base_id(self, name):
         """Get KB ID by name"""
-        self.cursor.execute("SELECT id FROM knowledge_bases WHERE name = ?", (name,))
-        result = self.cursor.fetchone()
+        with self._reader() as conn:
+            result = conn.execute(SQL_GET_KB_ID, (name,)).fetchone()
         return result[0] if result else None
     
     def get_knowledge_base_by_id(self, kb_id):
         """Get knowledge base details by ID"""
-        self.cursor.execute("SELECT * FROM knowledge_bases WHERE id = ?", (kb_id,))
-        result = self.cursor.fetchone()
-        if result:
-            return {
-                "id": result[0],
-                "name": result[1],
-                "directory": result[2],
-                "created_at": result[3]
-            }
-        return None
+        with self._reader() as conn:
+            result = conn.execute(SQL_GET_KB_BY_ID, (kb_id,)).fetchone()
+        return dict(result) if result else None
+    
+    def get_knowledge_base_by_name(self, name):
+        """Get knowledge base details by name"""
+        with self._reader() as conn:
+            result = conn.execute(SQL_GET_KB_BY_NAME, (name,)).fetchone()
+        return dict(result) if result else None
     
     def get_all_knowledge_bases(self):
         """Get all knowledge bases"""
-        self.cursor.execute("SELECT id, name, directory, created_at FROM knowledge_bases ORDER BY name")
-        results = self.cursor.fetchall()
-        
-        knowledge_bases = []
-        for row in results:
-            kb = {
-                "id": row[0],
-                "name": row[1],
-                "directory": row[2],
-                "created_at": row[3]
-            }
-            knowledge_bases.append(kb)
-        
-        return knowledge_bases
+        with self._reader() as conn:
+            return [dict(row) for row in conn.execute(SQL_GET_ALL_KBS).fetchall()]
     
     def add_document(self, kb_id, original_filename, original_path, is_scanned=False):
         """
@@ -148,19 +442,36 @@ class DBManager:
         Returns:
             int: ID of the created document or None if error
         """
+        doc_ids = self.add_documents_bulk(kb_id, [(original_filename, original_path, is_scanned)])
+        return doc_ids[0] if doc_ids else None
+    
+    def add_documents_bulk(self, kb_id, docs):
+        """
+        Add several documents to a knowledge base in a single transaction
+        
+        Args:
+            kb_id (int): Knowledge base ID
+            docs (list): (original_filename, original_path, is_scanned) tuples
+            
+        Returns:
+            list: IDs of the created documents, in input order (empty if error)
+        """
         try:
-            self.cursor.execute(
-                """INSERT INTO documents 
-                   (kb_id, original_filename, original_path, is_scanned, conversion_status) 
-                   VALUES (?, ?, ?, ?, ?)""",
-                (kb_id, original_filename, original_path, is_scanned, 
-                 'pending' if is_scanned else 'not_required')
-            )
-            self.conn.commit()
-            return self.cursor.lastrowid
-        except Exception as e:
-            print(f"Error adding document: {e}")
-            return None
+            doc_ids = []
+            # One commit for the whole batch instead of one per document.
+            # Rows are inserted individually so each lastrowid can be returned.
+            with self._writer() as conn:
+                for original_filename, original_path, is_scanned in docs:
+                    cur = conn.execute(
+                        SQL_INSERT_DOC,
+                        (kb_id, original_filename, original_path, is_scanned,
+                         'pending' if is_scanned else 'not_required')
+                    )
+                    doc_ids.append(cur.lastrowid)
+            return doc_ids
+        except Exception:
+            logger.exception("Error adding documents")
+            return []
     
     def update_document_conversion(self, doc_id, status, progress=None, converted_path=None, page_count=None):
         """
@@ -173,146 +484,368 @@ class DBManager:
             converted_path (str, optional): Path to the converted file
             page_count (int, optional): Number of pages in the document
         """
-        query = "UPDATE documents SET conversion_status = ?"
-        params = [status]
+        if (status == "in_progress" and progress is not None
+                and converted_path is None and page_count is None):
+            with self._progress_lock:
+                buffered = doc_id in self._converting
+                if buffered:
+                    # Progress tick on a document already marked in_progress:
+                    # buffer it for the next periodic flush
+                    self._progress_buf[doc_id] = (status, progress)
+                    self._start_flusher()
+                else:
+                    self._converting.add(doc_id)
+            if buffered:
+                self.data_version = next(self._versions)
+                return
         
-        if progress is not None:
-            query += ", conversion_progress = ?"
-            params.append(progress)
+        # The shape of the given optionals picks the precompiled statement,
+        # so the SQL text (and its cached prepared statement) never changes
+        optional = (progress, converted_path, page_count)
+        query = SQL_UPDATE_DOC[tuple(value is not None for value in optional)]
+        params = (status, *(value for value in optional if value is not None), doc_id)
         
-        if converted_path is not None:
-            query += ", converted_path = ?"
-            params.append(converted_path)
+        with self._flush_lock:
+            with self._progress_lock:
+                # This write supersedes anything still buffered for the document
+                self._progress_buf.pop(doc_id, None)
+                if status != "in_progress":
+                    self._converting.discard(doc_id)
+            
+            with self._writer() as conn:
+                conn.execute(query, params)
+    
+    def update_document_conversion_bulk(self, updates):
+        """
+        Store in_progress progress for several documents in a single transaction
         
-        if page_count is not None:
-            query += ", page_count = ?"
-            params.append(page_count)
+        Args:
+            updates (list): (doc_id, progress) tuples
+        """
+        rows = [("in_progress", progress, doc_id) for doc_id, progress in updates]
+        if not rows:
+            return
         
-        query += " WHERE id = ?"
-        params.append(doc_id)
+        with self._flush_lock:
+            with self._progress_lock:
+                # These writes supersede anything still buffered for the documents
+                for doc_id, _ in updates:
+                    self._progress_buf.pop(doc_id, None)
+                    self._converting.add(doc_id)
+            
+            with self._writer() as conn:
+                conn.executemany(SQL_UPDATE_DOC_PROGRESS, rows)
+    
+    def flush_progress(self):
+        """Write all buffered progress updates in a single transaction"""
+        with self._flush_lock:
+            with self._progress_lock:
+                if not self._progress_buf:
+                    return
+                snapshot = list(self._progress_buf.items())
+            
+            with self._writer() as conn:
+                conn.executemany(
+                    SQL_UPDATE_DOC_PROGRESS,
+                    [(status, progress, doc_id) for doc_id, (status, progress) in snapshot]
+                )
+            
+            # Entries stay buffered until committed so readers never see a
+            # value older than the newest one; drop only those that were not
+            # replaced by a newer tick in the meantime
+            with self._progress_lock:
+                for doc_id, entry in snapshot:
+                    if self._progress_buf.get(doc_id) is entry:
+                        del self._progress_buf[doc_id]
+    
+    def get_document_progress(self, doc_id):
+        """Get conversion progress, preferring a not yet flushed value"""
+        with self._progress_lock:
+            buffered = self._progress_buf.get(doc_id)
+        if buffered is not None:
+            return buffered[1]
         
-        self.cursor.execute(query, params)
-        self.conn.commit()
+        with self._reader() as conn:
+            result = conn.execute(SQL_GET_DOC_PROGRESS, (doc_id,)).fetchone()
+        return result[0] if result else None
+    
+    def _start_flusher(self):
+        """Start the background progress flusher (caller holds _progress_lock)"""
+        if self._flush_thread is None:
+            self._flush_thread = threading.Thread(
+                target=self._flush_loop, name="DBManagerProgressFlush", daemon=True
+            )
+            self._flush_thread.start()
+    
+    def _flush_loop(self):
+        """Periodically write buffered progress until close() is called"""
+        while not self._flush_stop.wait(PROGRESS_FLUSH_INTERVAL):
+            try:
+                self.flush_progress()
+            except Exception:
+                logger.exception("Error flushing conversion progress")
+    
+    def iter_documents_by_kb(self, kb_id):
+        """Yield the documents of a knowledge base without holding them all in memory"""
+        # The pooled connection stays checked out until the generator is
+        # exhausted or closed
+        with self._reader() as conn:
+            yield from _iter_dicts(conn.execute(SQL_GET_DOCS_BY_KB, (kb_id,)))
     
     def get_documents_by_kb(self, kb_id):
         """Get all documents for a knowledge base"""
-        self.cursor.execute("""
-            SELECT id, original_filename, original_path, converted_path, 
-                   is_scanned, conversion_status, conversion_progress, page_count
-            FROM documents 
-            WHERE kb_id = ?
-            ORDER BY original_filename
-        """, (kb_id,))
+        documents = list(self.iter_documents_by_kb(kb_id))
         
-        results = self.cursor.fetchall()
-        documents = []
+        self._apply_buffered_progress(documents)
+        return documents
+    
+    def get_kb_file_paths(self, kb_id):
+        """Get the path to serve for each document: converted if completed, else original"""
+        with self._reader() as conn:
+            return [row[0] for row in conn.execute(SQL_GET_KB_FILE_PATHS, (kb_id,))]
+    
+    def get_all_documents_grouped(self):
+        """
+        Get every knowledge base with its documents using a single query
         
-        for row in results:
-            doc = {
-                "id": row[0],
-                "original_filename": row[1],
-                "original_path": row[2],
-                "converted_path": row[3],
-                "is_scanned": bool(row[4]),
-                "conversion_status": row[5],
-                "conversion_progress": row[6],
-                "page_count": row[7]
-            }
-            documents.append(doc)
+        Returns:
+            dict: (kb_id, kb_name) -> list of document dictionaries, ordered
+                by KB name; knowledge bases without documents map to []
+        """
+        groups = {}
+        with self._reader() as conn:
+            for row in _iter_dicts(conn.execute(SQL_GET_ALL_DOCS_WITH_KB)):
+                docs = groups.setdefault((row.pop("kb_id"), row.pop("kb_name")), [])
+                # The LEFT JOIN yields one all-NULL document row for an empty KB
+                if row["id"] is not None:
+                    docs.append(row)
         
-        return documents
+        for documents in groups.values():
+            self._apply_buffered_progress(documents)
+        return groups
+    
+    def _apply_buffered_progress(self, documents):
+        """Report progress that has not been flushed to the database yet"""
+        with self._progress_lock:
+            if not self._progress_buf:
+                return
+            for doc in documents:
+                buffered = self._progress_buf.get(doc["id"])
+                if buffered is not None:
+                    doc["conversion_progress"] = buffered[1]
     
     def get_document_by_id(self, doc_id):
         """Get document details by ID"""
-        self.cursor.execute("""
-            SELECT id, kb_id, original_filename, original_path, converted_path, 
-                   is_scanned, conversion_status, conversion_progress, page_count
-            FROM documents 
-            WHERE id = ?
-        """, (doc_id,))
-        
-        result = self.cursor.fetchone()
-        if result:
-            return {
-                "id": result[0],
-                "kb_id": result[1],
-                "original_filename": result[2],
-                "original_path": result[3],
-                "converted_path": result[4],
-                "is_scanned": bool(result[5]),
-                "conversion_status": result[6],
-                "conversion_progress": result[7],
-                "page_count": result[8]
-            }
-        return None
+        with self._reader() as conn:
+            result = conn.execute(SQL_GET_DOC_BY_ID, (doc_id,)).fetchone()
+        return dict(result) if result else None
     
     def get_pending_conversions(self):
         """Get all documents pending conversion"""
-        self.cursor.execute("""
-            SELECT d.id, d.original_filename, d.original_path, k.name as kb_name
-            FROM documents d
-            JOIN knowledge_bases k ON d.kb_id = k.id
-            WHERE d.is_scanned = TRUE AND d.conversion_status = 'pending'
-        """)
-        
-        results = self.cursor.fetchall()
-        documents = []
-        
-        for row in results:
-            doc = {
-                "id": row[0],
-                "original_filename": row[1],
-                "original_path": row[2],
-                "kb_name": row[3]
-            }
-            documents.append(doc)
+        with self._reader() as conn:
+            return list(_iter_dicts(conn.execute(SQL_GET_PENDING_CONVERSIONS)))
+    
+    def get_pending_conversions_with_kb(self, kb_name):
+        """
+        Get a knowledge base's scanned documents that still need converting
         
-        return documents
+        Args:
+            kb_name (str): Name of the knowledge base
+            
+        Returns:
+            list: Dicts with id, original_path and the KB's directory for
+                every pending or failed scanned document
+        """
+        with self._reader() as conn:
+            return list(_iter_dicts(conn.execute(SQL_GET_CONVERTIBLE_DOCS_WITH_KB, (kb_name,))))
     
     def add_conversation(self, conversation_id, data_element, procedure, kb_id):
         """Add a new conversation"""
         try:
-            self.cursor.execute(
-                "INSERT INTO conversations (conversation_id, data_element, procedure, kb_id) VALUES (?, ?, ?, ?)",
-                (conversation_id, data_element, procedure, kb_id)
-            )
-            self.conn.commit()
+            with self._writer() as conn:
+                conn.execute(
+                    SQL_INSERT_CONVERSATION,
+                    (conversation_id, data_element, procedure, kb_id)
+                )
             return True
-        except Exception as e:
-            print(f"Error adding conversation: {e}")
+        except Exception:
+            logger.exception("Error adding conversation")
+            return False
+    
+    def add_conversation_with_messages(self, conversation_id, data_element, procedure, kb_id,
+                                       messages):
+        """
+        Add a new conversation and its messages in a single transaction
+        
+        Args:
+            conversation_id (str): Conversation ID
+            data_element (str): Data element the conversation is about
+            procedure (str): Procedure used
+            kb_id (int): Knowledge base ID
+            messages (list): (is_user, message) tuples, in conversation order
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with self._writer() as conn:
+                cur = conn.execute(
+                    SQL_INSERT_CONVERSATION,
+                    (conversation_id, data_element, procedure, kb_id)
+                )
+                conversation_pk = cur.lastrowid
+                conn.executemany(
+                    SQL_INSERT_MESSAGE,
+                    [(conversation_pk, is_user, message) for is_user, message in messages]
+                )
+            return True
+        except Exception:
+            logger.exception("Error adding conversation")
             return False
     
     def add_message(self, conversation_id, is_user, message):
         """Add a message to a conversation"""
+        return self.add_messages_bulk(conversation_id, [(is_user, message)])
+    
+    def add_messages_bulk(self, conversation_id, messages):
+        """
+        Add several messages to a conversation in a single transaction
+        
+        Args:
+            conversation_id (str): Conversation ID
+            messages (list): (is_user, message) tuples, in conversation order
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
         try:
-            self.cursor.execute(
-                "INSERT INTO messages (conversation_id, is_user, message) VALUES (?, ?, ?)",
-                (conversation_id, is_user, message)
-            )
-            self.conn.commit()
+            with self._writer() as conn:
+                row = conn.execute(SQL_GET_CONVERSATION_PK, (conversation_id,)).fetchone()
+                if row is None:
+                    logger.error("Error adding messages: unknown conversation %s", conversation_id)
+                    return False
+                conn.executemany(
+                    SQL_INSERT_MESSAGE,
+                    [(row[0], is_user, message) for is_user, message in messages]
+                )
             return True
-        except Exception as e:
-            print(f"Error adding message: {e}")
+        except Exception:
+            logger.exception("Error adding messages")
             return False
     
     def get_conversation_messages(self, conversation_id):
         """Get all messages for a conversation"""
-        self.cursor.execute("""
-            SELECT is_user, message, timestamp
-            FROM messages
-            WHERE conversation_id = ?
-            ORDER BY timestamp
-        """, (conversation_id,))
-        
-        results = self.cursor.fetchall()
-        messages = []
+        with self._reader() as conn:
+            cur = conn.execute(SQL_GET_CONVERSATION_MESSAGES, (conversation_id,))
+            return [dict(row) for row in cur.fetchall()]
+
+
+class QueuedDBWriter:
+    """
+    Applies document conversion updates on a dedicated thread
+    
+    Exposes the same update_document_conversion() as DBManager, so it can be
+    handed to TrackedPDFProcessor, but only enqueues the update; converting
+    threads never wait on a database write. Updates are applied in the order
+    they were queued; an update's on_applied callback runs on the writer
+    thread once it has been committed.
+    
+    Once a document reaches a final status, progress ticks for it are dropped
+    until a status-only in_progress update starts a new attempt.
+    """
+    _STOP = object()
+    
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._queue = queue.SimpleQueue()
+        # Documents whose last written status was final; only touched on the
+        # writer thread
+        self._finished = set()
+        self._thread = threading.Thread(
+            target=self._run, name="ConversionDBWriter", daemon=True
+        )
+        self._thread.start()
+    
+    def update_document_conversion(self, doc_id, status, progress=None,
+                                   converted_path=None, page_count=None, on_applied=None):
+        """Queue a conversion update without blocking"""
+        self._queue.put((doc_id, status, progress, converted_path, page_count, on_applied))
+    
+    def close(self):
+        """Write everything still queued and stop the writer thread"""
+        self._queue.put(self._STOP)
+        self._thread.join()
+    
+    def _run(self):
+        while True:
+            # Block for the first update, then gather whatever else arrives
+            # within the batch window
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + DB_WRITE_BATCH_WINDOW
+            while batch[-1] is not self._STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            stopping = batch[-1] is self._STOP
+            if stopping:
+                batch.pop()
+            self._apply(batch)
+            if stopping:
+                return
+    
+    @staticmethod
+    def _is_tick(status, progress, converted_path, page_count):
+        """Whether an update only moves an in_progress document's progress"""
+        return (status == "in_progress" and progress is not None
+                and converted_path is None and page_count is None)
+    
+    def _apply(self, batch):
+        # A bare progress tick is superseded by any later update for the same
+        # document, so only the newest one per document is written
+        seen = set()
+        updates = []
+        callbacks = []
+        for update in reversed(batch):
+            doc_id, status, progress, converted_path, page_count, on_applied = update
+            if not (self._is_tick(*update[1:5]) and doc_id in seen):
+                updates.append(update[:5])
+            seen.add(doc_id)
+            if on_applied is not None:
+                callbacks.append(on_applied)
+        updates.reverse()
         
-        for row in results:
-            message = {
-                "is_user": bool(row[0]),
-                "message": row[1],
-                "timestamp": row[2]
-            }
-            messages.append(message)
+        # Every surviving tick is the last update for its document, so the
+        # status changes go first and the ticks follow in one transaction
+        ticks = []
+        for update in updates:
+            doc_id, status = update[0], update[1]
+            if self._is_tick(*update[1:]):
+                # A late tick must not turn a finished document back to
+                # in_progress
+                if doc_id not in self._finished:
+                    ticks.append((doc_id, update[2]))
+                continue
+            if status == "in_progress":
+                self._finished.discard(doc_id)
+            else:
+                self._finished.add(doc_id)
+            try:
+                self.db_manager.update_document_conversion(*update)
+            except Exception:
+                logger.exception("Error writing conversion update for document %s", update[0])
+        if ticks:
+            try:
+                self.db_manager.update_document_conversion_bulk(ticks)
+            except Exception:
+                logger.exception("Error writing progress for %d document(s)", len(ticks))
         
-        return messages
\ No newline at end of file
+        for on_applied in reversed(callbacks):
+            try:
+                on_applied()
+            except Exception:
+                logger.exception("Error in conversion update callback")
@@ -1,27 +1,112 @@
 import sys
 import os
+import queue
+import logging
+import logging.handlers
 import pandas as pd
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QFileDialog, QTableView, QHeaderView,
                              QSplitter, QMessageBox, QLineEdit, QTextEdit, QFrame, 
                              QGridLayout, QSizePolicy, QComboBox, QDialog, QListWidget,
-                             QListWidgetItem, QDialogButtonBox, QFormLayout, QAbstractItemView)
-from PyQt6.QtCore import Qt, QRunnable, QThreadPool, pyqtSignal, QObject, QAbstractTableModel, QModelIndex
+                             QDialogButtonBox, QFormLayout, QAbstractItemView)
+from PyQt6.QtCore import Qt, QRunnable, QThreadPool, pyqtSignal, QObject, QAbstractTableModel, QModelIndex, QTimer, QFileSystemWatcher
 from PyQt6.QtGui import QColor, QFont, QPalette, QIcon, QPixmap
 from PyQt6.QtPdf import QPdfDocument
 from PyQt6.QtPdfWidgets import QPdfView
 
 # Import PDF management functionality
 from pdf_management_ui_complete import PDFManagementContent
-from pdf_conversion_worker import PDFConversionWorker, BatchConversionWorker
+from pdf_conversion_worker import PDFConversionWorker
 
 
-# Keep existing classes (LLMProcessor, ResultsTableModel, Worker classes, ModernFrame)
+# Keep existing classes (LLMProcessor, Worker classes, ModernFrame)
 # [LLMProcessor class implementation remains the same]
-# [ResultsTableModel class implementation remains the same]
 # [Worker classes implementation remains the same]
 # [ModernFrame class implementation remains the same]
 
+# Navigation button colours, parsed once per button; switching views only
+# flips the "active" property instead of installing a new style sheet
+NAV_BUTTON_STYLE = """
+    QPushButton#pdfMgmtButton { background-color: #8e44ad; }
+    QPushButton#pdfMgmtButton[active="true"] { background-color: #663399; }
+    QPushButton#processButton[active="true"] { background-color: #0078d4; }
+"""
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    Table model for LLM results, backed by a pandas DataFrame
+    """
+    def __init__(self, data, parent=None):
+        super().__init__(parent)
+        if not isinstance(data, pd.DataFrame):
+            data = pd.DataFrame(data)
+        self._data = data
+        # Cache headers and a plain 2-D array once; data() runs for every
+        # visible cell on each repaint, so it just indexes the array
+        self._columns = [str(column) for column in data.columns]
+        self._values = data.to_numpy(dtype=object)
+        self._row_count = len(data.index)
+        self._column_count = len(self._columns)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._column_count
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        value = self._values[index.row(), index.column()]
+        # Missing values come through as None, NaN or (Arrow backed columns)
+        # pd.NA, whose comparisons cannot be used as a bool
+        if pd.api.types.is_scalar(value) and pd.isna(value):
+            return ""
+        return str(value)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._columns[section]
+        return str(section + 1)
+
+
+class ExcelLoadSignals(QObject):
+    """
+    Signals for loading an Excel file in the background
+    """
+    result = pyqtSignal(object)  # pandas DataFrame
+    error = pyqtSignal(str)  # error message
+
+
+class ExcelLoadWorker(QRunnable):
+    """
+    Worker for reading an Excel file off the UI thread
+    """
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.signals = ExcelLoadSignals()
+
+    def run(self):
+        """Read the workbook and emit the resulting DataFrame"""
+        try:
+            try:
+                # calamine parses XLSX much faster than openpyxl, and Arrow
+                # backed columns avoid materializing object dtype
+                data = pd.read_excel(self.file_path, engine="calamine", dtype_backend="pyarrow")
+            except (ImportError, ValueError, TypeError):
+                # python-calamine or pyarrow not installed, or a pandas too
+                # old for them (ValueError "Unknown engine" before 2.2,
+                # TypeError for dtype_backend before 2.0); a workbook that
+                # is actually unreadable fails again here and is reported
+                data = pd.read_excel(self.file_path)
+            self.signals.result.emit(data)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
 
 # Main application class with integrated PDF management
 class DocumentProcessorApp(QMainWindow):
@@ -29,6 +114,9 @@ class DocumentProcessorApp(QMainWindow):
         super().__init__()
         self.llm_processor = LLMProcessor()
         
+        # Cached knowledge base names, reset when the PDF manager creates one
+        self._kb_cache = None
+        
         # Initialize UI
         self.setWindowTitle("LLM Document Processor")
         self.setGeometry(100, 100, 1280, 800)
@@ -61,6 +149,11 @@ class DocumentProcessorApp(QMainWindow):
         
         # PDF Management content (initially hidden)
         self.pdf_management_content = PDFManagementContent(self.llm_processor, self)
+        self.pdf_management_content.kbCreated.connect(self._invalidate_kb_cache)
+        # Only reload the PDF manager on show when its data has changed
+        self._pdf_mgmt_dirty = True
+        self.pdf_management_content.kbCreated.connect(self._mark_pdf_mgmt_dirty)
+        self.pdf_management_content.documentsChanged.connect(self._mark_pdf_mgmt_dirty)
         self.content_layout.addWidget(self.pdf_management_content)
         self.pdf_management_content.hide()
         
@@ -71,6 +164,9 @@ class DocumentProcessorApp(QMainWindow):
         self.content_layout.addWidget(self.process_content)
         self.process_content.hide()
         
+        # Knowledge base list (initially hidden)
+        self.setup_kb_list_content()
+        
         # Add content area to main layout
         self.main_layout.addWidget(self.content_area)
         
@@ -80,6 +176,12 @@ class DocumentProcessorApp(QMainWindow):
         # Setup thread pool for background tasks
         self.threadpool = QThreadPool()
         
+        # Cached os.path.exists results, invalidated when a watched directory changes
+        self._path_exists = {}
+        self._watched_dirs = set()
+        self._fs_watcher = QFileSystemWatcher(self)
+        self._fs_watcher.directoryChanged.connect(self._on_watched_dir_changed)
+        
         # Track active content
         self.active_content = None
 
@@ -101,6 +203,8 @@ class DocumentProcessorApp(QMainWindow):
         
         # Process data button
         self.process_btn = QPushButton("Process Documents")
+        self.process_btn.setObjectName("processButton")
+        self.process_btn.setStyleSheet(NAV_BUTTON_STYLE)
         self.process_btn.setMinimumHeight(50)
         self.process_btn.clicked.connect(self.show_process_content)
         buttons_layout.addWidget(self.process_btn)
@@ -109,39 +213,76 @@ class DocumentProcessorApp(QMainWindow):
         self.pdf_mgmt_btn = QPushButton("Manage PDF Documents")
         self.pdf_mgmt_btn.setMinimumHeight(50)
         self.pdf_mgmt_btn.clicked.connect(self.toggle_pdf_management)
-        self.pdf_mgmt_btn.setStyleSheet("background-color: #8e44ad;")
+        self.pdf_mgmt_btn.setObjectName("pdfMgmtButton")
+        self.pdf_mgmt_btn.setStyleSheet(NAV_BUTTON_STYLE)
         buttons_layout.addWidget(self.pdf_mgmt_btn)
         
         self.main_layout.addLayout(buttons_layout)
 
+    def setup_kb_list_content(self):
+        """Setup the knowledge base list shown in the main area"""
+        self.kb_frame = ModernFrame("Available Knowledge Bases")
+        
+        self.kb_list_widget = QListWidget()
+        self.kb_frame.layout.addWidget(self.kb_list_widget)
+        
+        self.no_kb_label = QLabel("No knowledge bases available. Use 'Manage PDF Documents' to create one.")
+        self.kb_frame.layout.addWidget(self.no_kb_label)
+        
+        self.content_layout.addWidget(self.kb_frame)
+        self.kb_frame.hide()
+
+    @staticmethod
+    def _set_button_active(button, active):
+        """Switch a navigation button between its normal and active colour"""
+        if button.property("active") == active:
+            return
+        button.setProperty("active", active)
+        # Property selectors are only re-evaluated on a repolish
+        button.style().unpolish(button)
+        button.style().polish(button)
+
+    def _kb_list(self):
+        """Get knowledge base names, querying the database only when needed"""
+        if self._kb_cache is None:
+            self._kb_cache = self.llm_processor.get_kb_list()
+        return self._kb_cache
+
+    def _invalidate_kb_cache(self, *args):
+        """Drop the cached knowledge base names"""
+        self._kb_cache = None
+
+    def _mark_pdf_mgmt_dirty(self, *args):
+        """Make the next PDF management show reload its content"""
+        self._pdf_mgmt_dirty = True
+
     def show_kb_list(self):
         """Show the knowledge base list in the main area"""
-        # Clear existing layout
-        self.clear_layout(self.content_layout)
-        
         # Available KBs
-        kb_list = self.llm_processor.get_kb_list()
-        kb_frame = ModernFrame("Available Knowledge Bases")
+        kb_list = self._kb_list()
+        
+        # Repopulate with one batched insert and no intermediate repaints
+        self.kb_list_widget.setUpdatesEnabled(False)
+        self.kb_list_widget.clear()
+        self.kb_list_widget.addItems(kb_list)
+        self.kb_list_widget.setUpdatesEnabled(True)
         
         if kb_list:
-            kb_list_widget = QListWidget()
-            for kb in kb_list:
-                item = QListWidgetItem(kb)
-                kb_list_widget.addItem(item)
-            kb_frame.layout.addWidget(kb_list_widget)
+            self.kb_list_widget.show()
+            self.no_kb_label.hide()
         else:
-            no_kb_label = QLabel("No knowledge bases available. Use 'Manage PDF Documents' to create one.")
-            kb_frame.layout.addWidget(no_kb_label)
+            self.kb_list_widget.hide()
+            self.no_kb_label.show()
         
-        self.content_layout.addWidget(kb_frame)
-        self.active_content = kb_frame
+        self.kb_frame.show()
+        self.active_content = self.kb_frame
 
     def toggle_pdf_management(self):
         """Toggle the PDF management content visibility"""
         if self.pdf_management_content.isVisible():
             self.pdf_management_content.hide()
             self.show_kb_list()
-            self.pdf_mgmt_btn.setStyleSheet("background-color: #8e44ad;")
+            self._set_button_active(self.pdf_mgmt_btn, False)
         else:
             # Hide all other content
             if self.active_content:
@@ -151,12 +292,14 @@ class DocumentProcessorApp(QMainWindow):
             
             # Show PDF management
             self.pdf_management_content.show()
-            self.pdf_management_content.refresh_content()  # Refresh the content
+            if self._pdf_mgmt_dirty:
+                self.pdf_management_content.refresh_content()  # Refresh the content
+                self._pdf_mgmt_dirty = False
             self.active_content = self.pdf_management_content
             
             # Update button style to indicate it's active
-            self.pdf_mgmt_btn.setStyleSheet("background-color: #663399;")
-            self.process_btn.setStyleSheet("")
+            self._set_button_active(self.pdf_mgmt_btn, True)
+            self._set_button_active(self.process_btn, False)
 
     def setup_process_content(self):
         """Setup the process document content"""
@@ -169,9 +312,9 @@ class DocumentProcessorApp(QMainWindow):
         self.file_path_label.setPlaceholderText("No file selected")
         file_layout.addWidget(self.file_path_label, 4)
         
-        browse_btn = QPushButton("Browse")
-        browse_btn.clicked.connect(self.load_excel)
-        file_layout.addWidget(browse_btn, 1)
+        self.browse_btn = QPushButton("Browse")
+        self.browse_btn.clicked.connect(self.load_excel)
+        file_layout.addWidget(self.browse_btn, 1)
         
         file_group.layout.addLayout(file_layout)
         self.process_layout.addWidget(file_group)
@@ -181,7 +324,7 @@ class DocumentProcessorApp(QMainWindow):
         kb_layout = QHBoxLayout()
         
         self.kb_combo = QComboBox()
-        kb_list = self.llm_processor.get_kb_list()
+        kb_list = self._kb_list()
         self.kb_combo.addItems(kb_list)
         kb_layout.addWidget(self.kb_combo)
         
@@ -197,6 +340,27 @@ class DocumentProcessorApp(QMainWindow):
         # Results area (initially empty)
         self.results_frame = ModernFrame("Results")
         self.results_layout = QVBoxLayout()
+        
+        # The results widgets are created once and reused for every run
+        self.loading_label = QLabel("Processing... Please wait.")
+        self.loading_label.hide()
+        self.results_layout.addWidget(self.loading_label)
+        
+        self.results_table_view = QTableView()
+        self.results_table_view.setModel(ResultsTableModel(pd.DataFrame()))
+        self.results_table_view.setSortingEnabled(True)
+        self.results_table_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.results_table_view.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.results_table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.results_table_view.clicked.connect(self.handle_table_click)
+        self.results_table_view.hide()
+        self.results_layout.addWidget(self.results_table_view)
+        
+        self.error_label = QLabel()
+        self.error_label.setStyleSheet("color: red;")
+        self.error_label.hide()
+        self.results_layout.addWidget(self.error_label)
+        
         self.results_frame.layout.addLayout(self.results_layout)
         self.process_layout.addWidget(self.results_frame)
         
@@ -209,6 +373,9 @@ class DocumentProcessorApp(QMainWindow):
         self.pdf_document = QPdfDocument()
         self.pdf_view.setDocument(self.pdf_document)
         self.pdf_view.setZoomMode(QPdfView.ZoomMode.FitToWidth)
+        self.pdf_document.statusChanged.connect(self.on_pdf_status_changed)
+        self._loaded_pdf_path = None
+        self._pending_pdf_page = None
         
         # Follow-up input
         followup_input_layout = QHBoxLayout()
@@ -236,14 +403,16 @@ class DocumentProcessorApp(QMainWindow):
     def show_process_content(self):
         """Show the process document content"""
         # Update KB combo in case KBs were added
+        kb_list = self._kb_list()
+        self.kb_combo.setUpdatesEnabled(False)
         self.kb_combo.clear()
-        kb_list = self.llm_processor.get_kb_list()
         self.kb_combo.addItems(kb_list)
+        self.kb_combo.setUpdatesEnabled(True)
         
         # Hide PDF management if visible
         if self.pdf_management_content.isVisible():
             self.pdf_management_content.hide()
-            self.pdf_mgmt_btn.setStyleSheet("background-color: #8e44ad;")
+            self._set_button_active(self.pdf_mgmt_btn, False)
         
         # Hide current active content
         if self.active_content and self.active_content != self.process_content:
@@ -254,7 +423,7 @@ class DocumentProcessorApp(QMainWindow):
         self.active_content = self.process_content
         
         # Update button style
-        self.process_btn.setStyleSheet("background-color: #0078d4;")
+        self._set_button_active(self.process_btn, True)
         
     def load_excel(self):
         """Load data from Excel file"""
@@ -264,20 +433,40 @@ class DocumentProcessorApp(QMainWindow):
         
         if not file_path:
             return
-            
-        try:
-            self.excel_data = pd.read_excel(file_path)
-            self.file_path_label.setText(file_path)
-            
-            # Display success message
-            QMessageBox.information(
-                self, "Success", f"Loaded Excel with {len(self.excel_data)} rows"
-            )
-        except Exception as e:
-            QMessageBox.critical(
-                self, "Error", f"Failed to load Excel file: {str(e)}"
-            )
-            self.excel_data = None
+        
+        # Read the workbook in the background so the UI keeps responding
+        self.browse_btn.setEnabled(False)
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        
+        worker = ExcelLoadWorker(file_path)
+        worker.signals.result.connect(
+            lambda data: self.handle_excel_loaded(file_path, data)
+        )
+        worker.signals.error.connect(self.handle_excel_error)
+        self.threadpool.start(worker)
+
+    def handle_excel_loaded(self, file_path, data):
+        """Handle a successfully loaded Excel file"""
+        QApplication.restoreOverrideCursor()
+        self.browse_btn.setEnabled(True)
+        
+        self.excel_data = data
+        self.file_path_label.setText(file_path)
+        
+        # Display success message
+        QMessageBox.information(
+            self, "Success", f"Loaded Excel with {len(self.excel_data)} rows"
+        )
+
+    def handle_excel_error(self, error_message):
+        """Handle a failure while loading an Excel file"""
+        QApplication.restoreOverrideCursor()
+        self.browse_btn.setEnabled(True)
+        
+        QMessageBox.critical(
+            self, "Error", f"Failed to load Excel file: {error_message}"
+        )
+        self.excel_data = None
 
     def process_data(self):
         """Process data using LLM"""
@@ -291,12 +480,12 @@ class DocumentProcessorApp(QMainWindow):
             return
             
         # Clear previous results
-        self.clear_layout(self.results_layout)
+        self.results_table_view.hide()
+        self.error_label.hide()
         self.followup_frame.hide()
         
         # Display loading indicator
-        loading_label = QLabel("Processing... Please wait.")
-        self.results_layout.addWidget(loading_label)
+        self.loading_label.show()
         
         # Create worker for background processing
         worker = LLMWorker(self.llm_processor, self.excel_data, selected_kb)
@@ -312,29 +501,18 @@ class DocumentProcessorApp(QMainWindow):
         self.current_results = results
         
         # Clear loading indicator
-        self.clear_layout(self.results_layout)
+        self.loading_label.hide()
         
-        # Create table model for results
-        table_model = ResultsTableModel(results)
-        
-        # Create table view
-        table_view = QTableView()
-        table_view.setModel(table_model)
-        table_view.setSortingEnabled(True)
-        table_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
-        table_view.setSelectionMode(QTableView.SelectionMode.SingleSelection)
-        table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        table_view.clicked.connect(self.handle_table_click)
-        
-        # Add to results layout
-        self.results_layout.addWidget(table_view)
+        # Swap in a model for the new results, converted to a DataFrame once
+        self.results_table_view.setModel(ResultsTableModel(pd.DataFrame(results)))
+        self.results_table_view.show()
 
     def handle_processing_error(self, error_message):
         """Handle errors from LLM processing"""
-        self.clear_layout(self.results_layout)
-        error_label = QLabel(f"Error: {error_message}")
-        error_label.setStyleSheet("color: red;")
-        self.results_layout.addWidget(error_label)
+        self.loading_label.hide()
+        self.results_table_view.hide()
+        self.error_label.setText(f"Error: {error_message}")
+        self.error_label.show()
 
     def handle_table_click(self, index):
         """Handle clicks on the results table"""
@@ -358,19 +536,65 @@ class DocumentProcessorApp(QMainWindow):
         self.followup_response.clear()
         
         # Load PDF if available
-        if file_path and os.path.exists(file_path):
+        if file_path and self._exists(file_path):
             self.load_pdf_document(file_path)
         else:
             # Clear PDF view
             self.pdf_document.close()
+            self._loaded_pdf_path = None
+
+    def _exists(self, path):
+        """Cached os.path.exists for files inside watched directories"""
+        exists = self._path_exists.get(path)
+        if exists is None:
+            exists = os.path.exists(path)
+            directory = os.path.dirname(os.path.abspath(path))
+            # Only cache results the watcher is able to invalidate
+            if directory in self._watched_dirs or self._fs_watcher.addPath(directory):
+                self._watched_dirs.add(directory)
+                self._path_exists[path] = exists
+        return exists
+
+    def _on_watched_dir_changed(self, directory):
+        """Forget cached existence results for files in a changed directory"""
+        for path in list(self._path_exists):
+            if os.path.dirname(os.path.abspath(path)) == directory:
+                del self._path_exists[path]
 
     def load_pdf_document(self, file_path, page=None):
         """Load a PDF document into the viewer"""
+        self._pending_pdf_page = page
+        
+        if file_path == self._loaded_pdf_path:
+            # Already loaded (or queued): only move to the requested page
+            self._show_pending_pdf_page()
+            return
+        
+        # Load on the next event loop pass so the click handler returns at once
+        self._loaded_pdf_path = file_path
+        QTimer.singleShot(0, lambda: self._load_pdf_now(file_path))
+
+    def _load_pdf_now(self, file_path):
+        """Replace the viewer document with the given file"""
+        if file_path != self._loaded_pdf_path:
+            # Superseded by a later selection before the load ran
+            return
+        
         self.pdf_document.close()
         self.pdf_document.load(file_path)
-        
+        self._show_pending_pdf_page()
+
+    def on_pdf_status_changed(self, status):
+        """Jump to a requested page once the document has finished loading"""
+        if status == QPdfDocument.Status.Ready:
+            self._show_pending_pdf_page()
+
+    def _show_pending_pdf_page(self):
+        """Show the requested page if the loaded document has it"""
+        page = self._pending_pdf_page
         if page is not None and page < self.pdf_document.pageCount():
             self.pdf_view.setPageNumber(page)
+            self._pending_pdf_page = None
 
     def send_followup(self):
         """Send a follow-up question"""
@@ -410,24 +634,32 @@ class DocumentProcessorApp(QMainWindow):
         """Handle error from follow-up query"""
         self.followup_response.setText(f"Error: {error_message}")
 
-    def clear_layout(self, layout):
-        """Clear all items from a layout"""
-        if layout is None:
-            return
-            
-        while layout.count():
-            item = layout.takeAt(0)
-            widget = item.widget()
-            
-            if widget is not None:
-                widget.deleteLater()
-            elif item.layout() is not None:
-                self.clear_layout(item.layout())
-                item.layout().deleteLater()
+
+def setup_logging(level=logging.INFO):
+    """
+    Route log records through a queue so callers never block on stream I/O
+    
+    Returns:
+        QueueListener: Started listener; stop() it on exit to flush the queue
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    return listener
 
 
 # Main application entry point
 if __name__ == "__main__":
+    log_listener = setup_logging()
+    
     app = QApplication(sys.argv)
     
     # Set application style
@@ -437,4 +669,8 @@ if __name__ == "__main__":
     main_window = DocumentProcessorApp()
     main_window.show()
     
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    # Writes queued by running conversions land before the database closes
+    main_window.llm_processor.close()
+    log_listener.stop()
+    sys.exit(exit_code)
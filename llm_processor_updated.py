@@ -1,7 +1,18 @@
 import os
 import sys
 import uuid
-from db_manager import DBManager
+import time
+import shutil
+import logging
+from db_manager import DBManager, QueuedDBWriter
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached query result is reused even though the database changed
+# since; conversion progress writes would otherwise invalidate the caches
+# several times a second. Writes made through LLMProcessor drop the caches
+# straight away.
+QUERY_CACHE_TTL = 0.5
 
 class LLMProcessor:
     def __init__(self, db_path="app_data.db"):
@@ -12,16 +23,52 @@ class LLMProcessor:
             db_path (str): Path to the SQLite database file
         """
         self.db_manager = DBManager(db_path)
+        # Shared background writer for conversion updates that the UI
+        # thread must not wait on
+        self.db_writer = QueuedDBWriter(self.db_manager)
         self.base_dir = "uploads"
+        # KB name -> (kb_id, directory); names and directories never change
+        # once a KB is registered, so lookups only hit the database once
+        self._kb_cache = {}
+        # Query results stamped with the DBManager data_version and the time
+        # they were read at; see _is_fresh
+        self._kb_list_cache = None
+        self._pending_cache = None
+        self._kb_documents_cache = {}
         
         # Create base directory if it doesn't exist
-        if not os.path.exists(self.base_dir):
-            os.makedirs(self.base_dir)
+        os.makedirs(self.base_dir, exist_ok=True)
     
     def close(self):
         """Close database connection"""
+        # Anything still queued is written first
+        self.db_writer.close()
         self.db_manager.close()
     
+    def _is_fresh(self, cached):
+        """Whether a (version, read_at, result) cache entry can be reused"""
+        return cached is not None and (
+            cached[0] == self.db_manager.data_version
+            or time.monotonic() - cached[1] < QUERY_CACHE_TTL
+        )
+    
+    def invalidate_cache(self):
+        """Drop cached query results so the next call reads the database"""
+        self._kb_list_cache = None
+        self._pending_cache = None
+        self._kb_documents_cache.clear()
+    
+    def _lookup_kb(self, kb_name):
+        """Return (kb_id, directory) for a knowledge base, or None if it doesn't exist"""
+        kb = self._kb_cache.get(kb_name)
+        if kb is None:
+            row = self.db_manager.get_knowledge_base_by_name(kb_name)
+            if row is None:
+                return None
+            kb = (row["id"], row["directory"])
+            self._kb_cache[kb_name] = kb
+        return kb
+    
     def create_kb(self, kb_name):
         """
         Create a new knowledge base directory and register in database
@@ -39,7 +86,11 @@ class LLMProcessor:
             
             # Add to database
             kb_id = self.db_manager.add_knowledge_base(kb_name, kb_dir)
-            return kb_id is not None
+            if kb_id is None:
+                return False
+            self._kb_cache[kb_name] = (kb_id, kb_dir)
+            self.invalidate_cache()
+            return True
         return False
     
     def add_document_to_kb(self, kb_name, file_path, is_scanned=False):
@@ -54,38 +105,77 @@ class LLMProcessor:
         Returns:
             int: Document ID if successful, None otherwise
         """
-        # Get KB ID
-        kb_id = self.db_manager.get_knowledge_base_id(kb_name)
-        if not kb_id:
+        kb = self._lookup_kb(kb_name)
+        if kb is None:
             return None
         
-        kb_dir = self.get_kb_directory(kb_name)
+        kb_id, kb_dir = kb
         file_name = os.path.basename(file_path)
         destination = os.path.join(kb_dir, file_name)
         
         try:
-            # Copy file to KB directory
-            with open(file_path, 'rb') as src_file:
-                with open(destination, 'wb') as dst_file:
-                    dst_file.write(src_file.read())
+            # Copy file to KB directory. copyfile never holds the whole file
+            # in memory: it uses sendfile where available and otherwise
+            # streams through copyfileobj's fixed-size buffer.
+            shutil.copyfile(file_path, destination)
             
             # Add to database
             doc_id = self.db_manager.add_document(
                 kb_id, file_name, destination, is_scanned
             )
+            self.invalidate_cache()
             
             return doc_id
-        except Exception as e:
-            print(f"Error copying file: {e}")
+        except Exception:
+            logger.exception("Error copying file")
             return None
     
+    def add_documents_to_kb(self, kb_name, file_paths, is_scanned=False):
+        """
+        Add several documents to the specified knowledge base
+        
+        Files are copied first and then registered with a single database
+        transaction. Files that fail to copy are skipped.
+        
+        Args:
+            kb_name (str): Name of the knowledge base
+            file_paths (list): Paths to the document files
+            is_scanned (bool): Whether the documents are scanned PDFs
+            
+        Returns:
+            list: IDs of the documents that were added
+        """
+        kb = self._lookup_kb(kb_name)
+        if kb is None:
+            return []
+        
+        kb_id, kb_dir = kb
+        docs = []
+        
+        for file_path in file_paths:
+            file_name = os.path.basename(file_path)
+            destination = os.path.join(kb_dir, file_name)
+            
+            try:
+                # Same constant-memory copy as add_document_to_kb
+                shutil.copyfile(file_path, destination)
+            except Exception:
+                logger.exception("Error copying file")
+                continue
+            
+            docs.append((file_name, destination, is_scanned))
+        
+        if not docs:
+            return []
+        
+        doc_ids = self.db_manager.add_documents_bulk(kb_id, docs)
+        self.invalidate_cache()
+        return doc_ids
+    
     def get_kb_directory(self, kb_name):
         """Get the directory path for a knowledge base"""
-        kb_id = self.db_manager.get_knowledge_base_id(kb_name)
-        if kb_id:
-            kb = self.db_manager.get_knowledge_base_by_id(kb_id)
-            return kb["directory"]
-        return None
+        kb = self._lookup_kb(kb_name)
+        return kb[1] if kb else None
     
     def get_kb_files(self, kb_name):
         """
@@ -97,21 +187,13 @@ class LLMProcessor:
         Returns:
             list: List of file paths
         """
-        kb_id = self.db_manager.get_knowledge_base_id(kb_name)
-        if not kb_id:
+        kb = self._lookup_kb(kb_name)
+        if kb is None:
             return []
         
-        documents = self.db_manager.get_documents_by_kb(kb_id)
-        files = []
-        
-        for doc in documents:
-            # Use converted path if available, otherwise use original
-            if doc["converted_path"] and os.path.exists(doc["converted_path"]):
-                files.append(doc["converted_path"])
-            elif os.path.exists(doc["original_path"]):
-                files.append(doc["original_path"])
-        
-        return files
+        # The database decides between converted and original copies, so
+        # this path needs no filesystem calls
+        return self.db_manager.get_kb_file_paths(kb[0])
     
     def get_kb_list(self):
         """
@@ -120,12 +202,19 @@ class LLMProcessor:
         Returns:
             list: List of knowledge base names
         """
-        kbs = self.db_manager.get_all_knowledge_bases()
-        return [kb["name"] for kb in kbs]
+        if not self._is_fresh(self._kb_list_cache):
+            version = self.db_manager.data_version
+            kbs = self.db_manager.get_all_knowledge_bases()
+            self._kb_list_cache = (version, time.monotonic(), [kb["name"] for kb in kbs])
+        return self._kb_list_cache[2]
     
     def get_pending_conversions(self):
         """Get list of documents pending conversion"""
-        return self.db_manager.get_pending_conversions()
+        if not self._is_fresh(self._pending_cache):
+            version = self.db_manager.data_version
+            self._pending_cache = (version, time.monotonic(),
+                                   self.db_manager.get_pending_conversions())
+        return self._pending_cache[2]
     
     def get_kb_documents(self, kb_name):
         """
@@ -137,17 +226,34 @@ class LLMProcessor:
         Returns:
             list: List of document dictionaries
         """
-        kb_id = self.db_manager.get_knowledge_base_id(kb_name)
-        if not kb_id:
+        kb = self._lookup_kb(kb_name)
+        if kb is None:
             return []
         
-        return self.db_manager.get_documents_by_kb(kb_id)
+        kb_id = kb[0]
+        cached = self._kb_documents_cache.get(kb_id)
+        if not self._is_fresh(cached):
+            version = self.db_manager.data_version
+            cached = (version, time.monotonic(), self.db_manager.get_documents_by_kb(kb_id))
+            self._kb_documents_cache[kb_id] = cached
+        return cached[2]
+    
+    def get_all_kb_documents(self):
+        """
+        Get every knowledge base with its documents in one database query
+        
+        Returns:
+            dict: Knowledge base name -> list of document dictionaries
+        """
+        groups = self.db_manager.get_all_documents_grouped()
+        return {kb_name: docs for (kb_id, kb_name), docs in groups.items()}
     
     def update_document_conversion(self, doc_id, status, progress=None, converted_path=None, page_count=None):
         """Update document conversion status in the database"""
         self.db_manager.update_document_conversion(
             doc_id, status, progress, converted_path, page_count
         )
+        self.invalidate_cache()
     
     def process_query(self, data_element, procedure, kb_name):
         """
@@ -162,9 +268,8 @@ class LLMProcessor:
             dict: Result dictionary
         """
         try:
-            # Get KB ID
-            kb_id = self.db_manager.get_knowledge_base_id(kb_name)
-            if not kb_id:
+            kb = self._lookup_kb(kb_name)
+            if kb is None:
                 return {"result": "Error: Knowledge base not found", "page": None, "conversation_id": None, "file": None}
             
             # Get files for the KB (prioritizing converted files)
@@ -179,13 +284,12 @@ class LLMProcessor:
             # Generate a conversation ID
             conversation_id = f"conv_{uuid.uuid4().hex}"
             
-            # Store conversation in database
-            self.db_manager.add_conversation(conversation_id, data_element, procedure, kb_id)
-            
-            # Store initial query and response as messages
+            # Store the conversation, user query and system response in one transaction
             query_message = f"{data_element} - {procedure}"
-            self.db_manager.add_message(conversation_id, True, query_message)  # User query
-            self.db_manager.add_message(conversation_id, False, result)  # System response
+            self.db_manager.add_conversation_with_messages(
+                conversation_id, data_element, procedure, kb[0],
+                [(True, query_message), (False, result)]
+            )
             
             return {
                 "result": result, 
@@ -195,7 +299,7 @@ class LLMProcessor:
                 "kb_name": kb_name
             }
         except Exception as e:
-            print(f"Error processing query: {e}")
+            logger.exception("Error processing query")
             return {
                 "result": f"Error: {str(e)}", 
                 "page": None, 
@@ -216,21 +320,20 @@ class LLMProcessor:
             dict: Response dictionary
         """
         try:
-            # Store user question in database
-            self.db_manager.add_message(conversation_id, True, question)
-            
             # This is a placeholder - replace with your actual follow-up API call
             response = f"Follow-up answer to: {question}"
             
-            # Store system response in database
-            self.db_manager.add_message(conversation_id, False, response)
+            # Store user question and system response in one transaction
+            self.db_manager.add_messages_bulk(
+                conversation_id, [(True, question), (False, response)]
+            )
             
             return {
                 "response": response, 
                 "conversation_id": conversation_id
             }
         except Exception as e:
-            print(f"Error processing follow-up: {e}")
+            logger.exception("Error processing follow-up")
             return {
                 "response": f"Error: {str(e)}", 
                 "conversation_id": conversation_id
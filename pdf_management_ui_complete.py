@@ -1,115 +1,337 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-                             QListWidget, QListWidgetItem, QProgressBar, QCheckBox,
-                             QMessageBox, QWidget, QGroupBox, QScrollArea, QFormLayout)
-from PyQt6.QtCore import Qt, QSize, QThreadPool
-from PyQt6.QtGui import QIcon, QColor
-from pdf_conversion_worker import PDFConversionWorker, BatchConversionWorker
+                             QListView, QStyledItemDelegate, QStyle, QStyleOptionButton,
+                             QStyleOptionProgressBar, QApplication, QCheckBox,
+                             QMessageBox, QGroupBox, QScrollArea, QFormLayout,
+                             QComboBox, QInputDialog, QFileDialog, QFileIconProvider)
+from PyQt6.QtCore import (Qt, QSize, QRect, QEvent, QThreadPool, QTimer, pyqtSignal, pyqtSlot,
+                          QAbstractListModel, QModelIndex)
+from PyQt6.QtGui import QIcon, QColor, QPalette, QStaticText
+from pdf_conversion_worker import PDFConversionWorker
 import os
+import html
+import itertools
+from collections import OrderedDict
 
-class DocumentListItem(QWidget):
+# Conversion status -> (status line text, text colour), built once so
+# painting a row is a dict lookup rather than string formatting
+_STATUS_STYLE = {
+    status: (f"Status: {status.replace('_', ' ').title()}", color)
+    for status, color in {
+        "pending": "#FF9800",  # Orange
+        "in_progress": "#2196F3",  # Blue
+        "completed": "#4CAF50",  # Green
+        "failed": "#F44336",  # Red
+        "not_required": "#9E9E9E"  # Gray
+    }.items()
+}
+_UNKNOWN_STATUS_STYLE = ("Status: Unknown", "#000000")
+
+# Scanned documents in these states get a Convert button / a progress bar
+_CONVERTIBLE_STATUSES = frozenset({"pending", "failed"})
+_PROGRESS_STATUSES = frozenset({"pending", "in_progress"})
+
+# Progress signals are collected and applied at most this often (ms)
+PROGRESS_FLUSH_MS = 75
+
+# Conversions running at once. Each OCR job is CPU and memory heavy, so
+# the pool stays well below idealThreadCount() on many-core machines
+MAX_CONVERSION_THREADS = min(4, os.cpu_count() or 4)
+
+# Height (px) of every document row
+ROW_HEIGHT = 80
+
+# Rows laid out per event loop pass when a list is (re)populated
+LAYOUT_BATCH_SIZE = 50
+
+# Start directories with at least this many entries open in Qt's own file
+# dialog with plain icons; smaller ones keep the platform's native picker
+LARGE_DIRECTORY_ENTRIES = 1000
+
+
+def _is_large_directory(path):
+    """Whether a directory has at least LARGE_DIRECTORY_ENTRIES entries"""
+    try:
+        with os.scandir(path) as entries:
+            # Stop counting at the threshold; scandir reads no metadata
+            count = sum(1 for _ in itertools.islice(entries, LARGE_DIRECTORY_ENTRIES))
+        return count >= LARGE_DIRECTORY_ENTRIES
+    except OSError:
+        return False
+
+
+class DocumentModel(QAbstractListModel):
     """
-    Custom widget for displaying document with status in a list
+    List model holding the documents of one knowledge base
     """
-    def __init__(self, doc_data, parent=None):
+    DocIdRole = Qt.ItemDataRole.UserRole + 1
+    StatusRole = Qt.ItemDataRole.UserRole + 2
+    ProgressRole = Qt.ItemDataRole.UserRole + 3
+    PageCountRole = Qt.ItemDataRole.UserRole + 4
+    ScannedRole = Qt.ItemDataRole.UserRole + 5
+    
+    # Document dict key behind each custom role
+    _ROLE_KEYS = {
+        DocIdRole: "id",
+        StatusRole: "conversion_status",
+        ProgressRole: "conversion_progress",
+        PageCountRole: "page_count",
+        ScannedRole: "is_scanned",
+    }
+    
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.doc_id = doc_data["id"]
-        self.doc_data = doc_data
+        self._docs = []
+        self._rows = {}  # doc_id -> row, for updates coming from workers
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._docs)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        doc = self._docs[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return doc["original_filename"]
+        key = self._ROLE_KEYS.get(role)
+        return doc[key] if key is not None else None
+    
+    def set_documents(self, documents):
+        """Replace all rows with the given document dictionaries"""
+        self.beginResetModel()
+        # Rows are updated in place, so keep our own copies
+        self._docs = [dict(doc) for doc in documents]
+        self._rows = {doc["id"]: row for row, doc in enumerate(self._docs)}
+        self.endResetModel()
+    
+    def sync_documents(self, documents):
+        """
+        Bring the rows in line with a fresh document list, touching only
+        rows that were added, removed or changed
+        """
+        new_docs = [dict(doc) for doc in documents]
+        new_ids = {doc["id"] for doc in new_docs}
+        
+        # Removed documents, bottom-up so earlier row numbers stay valid
+        for row in range(len(self._docs) - 1, -1, -1):
+            if self._docs[row]["id"] not in new_ids:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._docs[row]
+                self.endRemoveRows()
+        
+        # Inserting in place needs the surviving rows to already be in the
+        # new order; fall back to a reset if they are not
+        kept_ids = {doc["id"] for doc in self._docs}
+        if [doc["id"] for doc in self._docs] != [doc["id"] for doc in new_docs if doc["id"] in kept_ids]:
+            self.set_documents(new_docs)
+            return
         
-        # Main layout
-        self.layout = QHBoxLayout(self)
-        self.layout.setContentsMargins(5, 5, 5, 5)
-        
-        # Document info layout
-        info_layout = QVBoxLayout()
-        
-        # Document name
-        self.name_label = QLabel(doc_data["original_filename"])
-        self.name_label.setStyleSheet("font-weight: bold;")
-        info_layout.addWidget(self.name_label)
-        
-        # Status info
-        status_layout = QHBoxLayout()
-        
-        status_text = doc_data["conversion_status"].replace("_", " ").title()
-        status_color = self._get_status_color(doc_data["conversion_status"])
-        
-        self.status_label = QLabel(f"Status: {status_text}")
-        self.status_label.setStyleSheet(f"color: {status_color}")
-        status_layout.addWidget(self.status_label)
-        
-        # Add page count if available
-        if doc_data["page_count"] and doc_data["page_count"] > 0:
-            self.pages_label = QLabel(f"Pages: {doc_data['page_count']}")
-            status_layout.addWidget(self.pages_label)
-        
-        info_layout.addLayout(status_layout)
-        
-        # Add progress bar for conversion
-        if doc_data["is_scanned"] and doc_data["conversion_status"] in ["pending", "in_progress"]:
-            self.progress_bar = QProgressBar()
-            self.progress_bar.setMinimum(0)
-            self.progress_bar.setMaximum(100)
-            self.progress_bar.setValue(int(doc_data["conversion_progress"] or 0))
-            info_layout.addWidget(self.progress_bar)
-        
-        self.layout.addLayout(info_layout)
-        
-        # Add convert button for scanned documents that need conversion
-        if doc_data["is_scanned"] and doc_data["conversion_status"] in ["pending", "failed"]:
-            self.convert_btn = QPushButton("Convert")
-            self.convert_btn.clicked.connect(self.on_convert_clicked)
-            self.layout.addWidget(self.convert_btn)
-        
-        # Add spacer to push content to the left
-        self.layout.addStretch()
-    
-    def _get_status_color(self, status):
-        """Get appropriate color for status text"""
-        status_colors = {
-            "pending": "#FF9800",  # Orange
-            "in_progress": "#2196F3",  # Blue
-            "completed": "#4CAF50",  # Green
-            "failed": "#F44336",  # Red
-            "not_required": "#9E9E9E"  # Gray
-        }
-        return status_colors.get(status, "#000000")
-    
-    def update_progress(self, progress):
-        """Update progress bar value"""
-        if hasattr(self, "progress_bar"):
-            self.progress_bar.setValue(int(progress))
-    
-    def update_status(self, status, progress=None):
-        """Update status label and progress"""
-        status_text = status.replace("_", " ").title()
-        status_color = self._get_status_color(status)
-        self.status_label.setText(f"Status: {status_text}")
-        self.status_label.setStyleSheet(f"color: {status_color}")
-        
-        if progress is not None and hasattr(self, "progress_bar"):
-            self.progress_bar.setValue(int(progress))
-    
-    def on_convert_clicked(self):
-        """Handle convert button click"""
-        # This will be connected to the parent dialog's convert method
-        pass
+        for row, doc in enumerate(new_docs):
+            if doc["id"] not in kept_ids:
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._docs.insert(row, doc)
+                self.endInsertRows()
+            elif self._docs[row] != doc:
+                self._docs[row] = doc
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+        
+        self._rows = {doc["id"]: row for row, doc in enumerate(self._docs)}
+    
+    def has_doc(self, doc_id):
+        """Whether the document is one of the current rows"""
+        return doc_id in self._rows
+    
+    def update_doc(self, doc_id, status=None, progress=None, page_count=None):
+        """Update one document's conversion state and repaint only its row"""
+        row = self._rows.get(doc_id)
+        if row is None:
+            return
+        
+        doc = self._docs[row]
+        roles = []
+        if status is not None:
+            doc["conversion_status"] = status
+            roles.append(self.StatusRole)
+        if progress is not None:
+            doc["conversion_progress"] = progress
+            roles.append(self.ProgressRole)
+        if page_count is not None:
+            doc["page_count"] = page_count
+            roles.append(self.PageCountRole)
+        
+        if roles:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, roles)
+
+
+class DocumentDelegate(QStyledItemDelegate):
+    """
+    Paints a document row (name, status, pages, progress and a Convert
+    button) without creating any per-row widgets
+    """
+    convertRequested = pyqtSignal(int)  # doc_id
+    
+    MARGIN = 5
+    BUTTON_SIZE = QSize(80, 28)
+    PROGRESS_HEIGHT = 14
+    # Laid out row texts kept; comfortably more rows than fit on screen, so
+    # scrolling back and forth keeps hitting the cache
+    TEXT_CACHE_SIZE = 64
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # (name, status, page_count) -> laid out text block, least recently
+        # painted first
+        self._text_cache = OrderedDict()
+        # Only rect, state and progress change between rows
+        self._bar = QStyleOptionProgressBar()
+        self._bar.minimum = 0
+        self._bar.maximum = 100
+        self._bar.textVisible = False
+    
+    def sizeHint(self, option, index):
+        # Width follows the view; only the fixed height matters
+        return QSize(-1, ROW_HEIGHT)
+    
+    def _button_rect(self, rect):
+        """Area of the Convert button, right-aligned in the row"""
+        size = self.BUTTON_SIZE
+        return QRect(
+            rect.right() - self.MARGIN - size.width(),
+            rect.center().y() - size.height() // 2,
+            size.width(), size.height()
+        )
+    
+    @staticmethod
+    def _has_convert_button(status, is_scanned):
+        return is_scanned and status in _CONVERTIBLE_STATUSES
+    
+    def _row_text(self, name, status, page_count):
+        """Name, status and page count as one rich text block, built once per state"""
+        key = (name, status, page_count)
+        text = self._text_cache.get(key)
+        if text is not None:
+            self._text_cache.move_to_end(key)
+        else:
+            status_text, status_color = _STATUS_STYLE.get(status, _UNKNOWN_STATUS_STYLE)
+            markup = (f"<b>{html.escape(name)}</b><br>"
+                      f"<span style='color:{status_color}'>{status_text}</span>")
+            if page_count and page_count > 0:
+                markup += f"&nbsp;&nbsp;&nbsp;Pages: {page_count}"
+            text = QStaticText(f"<span style='white-space:nowrap'>{markup}</span>")
+            text.setTextFormat(Qt.TextFormat.RichText)
+            self._text_cache[key] = text
+            if len(self._text_cache) > self.TEXT_CACHE_SIZE:
+                self._text_cache.popitem(last=False)
+        return text
+    
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget else QApplication.style()
+        # Selection / hover background
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, option.widget)
+        
+        status = index.data(DocumentModel.StatusRole)
+        page_count = index.data(DocumentModel.PageCountRole)
+        is_scanned = bool(index.data(DocumentModel.ScannedRole))
+        has_button = self._has_convert_button(status, is_scanned)
+        
+        content = option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        if has_button:
+            content.setRight(self._button_rect(option.rect).left() - self.MARGIN)
+        
+        # Document name, status info and page count in a single text block
+        text = self._row_text(index.data(Qt.ItemDataRole.DisplayRole), status, page_count)
+        painter.save()
+        painter.setClipRect(content)
+        painter.setFont(option.font)
+        # Uncoloured text (name, page count) must stay readable on the
+        # selection highlight
+        text_role = (QPalette.ColorRole.HighlightedText
+                     if option.state & QStyle.StateFlag.State_Selected
+                     else QPalette.ColorRole.Text)
+        painter.setPen(option.palette.color(text_role))
+        painter.drawStaticText(content.topLeft(), text)
+        painter.restore()
+        
+        # Progress bar for conversion
+        if is_scanned and status in _PROGRESS_STATUSES:
+            bar = self._bar
+            bar.rect = QRect(content.left(), content.top() + int(text.size().height()) + 6,
+                             content.width(), self.PROGRESS_HEIGHT)
+            # Qt 6 styles read the bar's direction from State_Horizontal,
+            # which the row's own state does not carry
+            bar.state = option.state | QStyle.StateFlag.State_Horizontal
+            bar.palette = option.palette
+            bar.direction = option.direction
+            bar.progress = int(index.data(DocumentModel.ProgressRole) or 0)
+            style.drawControl(QStyle.ControlElement.CE_ProgressBar, bar, painter, option.widget)
+        
+        # Convert button for scanned documents that need conversion
+        if has_button:
+            button = QStyleOptionButton()
+            button.rect = self._button_rect(option.rect)
+            button.text = "Convert"
+            button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+            style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+    
+    def editorEvent(self, event, model, option, index):
+        if (event.type() in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease)
+                and self._has_convert_button(index.data(DocumentModel.StatusRole),
+                                             bool(index.data(DocumentModel.ScannedRole)))
+                and self._button_rect(option.rect).contains(event.position().toPoint())):
+            # Clicks on the button never change the selection
+            if event.type() == QEvent.Type.MouseButtonRelease:
+                self.convertRequested.emit(index.data(DocumentModel.DocIdRole))
+            return True
+        return super().editorEvent(event, model, option, index)
 
 
 class PDFManagementDialog(QDialog):
     """
     Dialog for managing PDF documents in knowledge bases
     """
+    kbCreated = pyqtSignal(str)  # kb_name
+    documentsChanged = pyqtSignal()  # documents added or finished converting
+    # Emitted from the DB writer thread once a final conversion state is
+    # stored, and delivered on the UI thread
+    _finalStateStored = pyqtSignal()
+    
     def __init__(self, llm_processor, parent=None):
         super().__init__(parent)
         self.llm_processor = llm_processor
-        self.thread_pool = QThreadPool()
-        self.document_widgets = {}  # Store widgets by doc_id for updates
+        # Owned by the dialog, so the cap applies to conversions only and
+        # leaves QThreadPool.globalInstance() to the rest of the app; it goes
+        # away (after its running workers finish) together with the dialog
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(MAX_CONVERSION_THREADS)
+        self._shown_kb = None  # KB whose documents the list currently holds
+        self._ensured_dirs = set()  # Output directories already created
+        self._active_doc_ids = set()  # Documents queued or converting
+        self._last_doc_dir = None  # Directory documents were last added from
+        # Generic icons only, so the file picker never has to inspect each
+        # entry to draw it; the dialog does not take ownership, so keep it
+        self._icon_provider = QFileIconProvider()
+        self._icon_provider.setOptions(QFileIconProvider.Option.DontUseCustomDirectoryIcons)
+        
+        # Conversion progress and final states are written from the
+        # processor's background thread so bursts of updates never block
+        # painting
+        self._db_writer = llm_processor.db_writer
+        self._finalStateStored.connect(self._on_final_state_stored)
+        
+        # Latest progress per document, applied to the DB and view in one
+        # go when the timer fires instead of on every worker signal
+        self._pending_progress = {}
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setSingleShot(True)
+        self._progress_timer.setInterval(PROGRESS_FLUSH_MS)
+        self._progress_timer.timeout.connect(self._flush_progress)
         
         self.setWindowTitle("PDF Document Management")
         self.setMinimumSize(700, 500)
         
         self.setup_ui()
-        self.load_knowledge_bases()
+        self.refresh_content()
     
     def setup_ui(self):
         """Setup the dialog UI components"""
@@ -134,9 +356,22 @@ class PDFManagementDialog(QDialog):
         doc_group = QGroupBox("Documents")
         doc_layout = QVBoxLayout(doc_group)
         
-        self.document_list = QListWidget()
-        self.document_list.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
-        self.document_list.setVerticalScrollMode(QListWidget.ScrollMode.ScrollPerPixel)
+        # Rows are painted by the delegate on demand, so only visible
+        # documents cost anything
+        self.document_model = DocumentModel(self)
+        self.document_delegate = DocumentDelegate(self)
+        self.document_delegate.convertRequested.connect(self.start_conversion)
+        
+        self.document_list = QListView()
+        self.document_list.setModel(self.document_model)
+        self.document_list.setItemDelegate(self.document_delegate)
+        self.document_list.setSelectionMode(QListView.SelectionMode.SingleSelection)
+        self.document_list.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        # Every row has the same height, so the view only measures one
+        self.document_list.setUniformItemSizes(True)
+        # Lay out large lists in slices so the dialog keeps responding
+        self.document_list.setLayoutMode(QListView.LayoutMode.Batched)
+        self.document_list.setBatchSize(LAYOUT_BATCH_SIZE)
         doc_layout.addWidget(self.document_list)
         
         # Action buttons
@@ -151,7 +386,7 @@ class PDFManagementDialog(QDialog):
         action_layout.addWidget(self.batch_convert_btn)
         
         self.refresh_btn = QPushButton("Refresh")
-        self.refresh_btn.clicked.connect(self.refresh_document_list)
+        self.refresh_btn.clicked.connect(self.refresh_content)
         action_layout.addWidget(self.refresh_btn)
         
         doc_layout.addLayout(action_layout)
@@ -174,7 +409,31 @@ class PDFManagementDialog(QDialog):
             self.kb_combo.addItems(kb_list)
         else:
             # No KBs available
-            self.document_list.clear()
+            self.show_documents(None, [])
+            self.add_doc_btn.setEnabled(False)
+            self.batch_convert_btn.setEnabled(False)
+    
+    def refresh_content(self):
+        """Reload knowledge bases and the current KB's documents in one query"""
+        docs_by_kb = self.llm_processor.get_all_kb_documents()
+        current_kb = self.kb_combo.currentText()
+        
+        # Repopulate the selector without triggering a per-KB reload
+        self.kb_combo.blockSignals(True)
+        self.kb_combo.clear()
+        self.kb_combo.addItems(list(docs_by_kb))
+        index = self.kb_combo.findText(current_kb)
+        self.kb_combo.setCurrentIndex(index if index >= 0 else 0)
+        self.kb_combo.blockSignals(False)
+        
+        kb_name = self.kb_combo.currentText()
+        if kb_name:
+            self.show_documents(kb_name, docs_by_kb[kb_name])
+            self.add_doc_btn.setEnabled(True)
+            self.batch_convert_btn.setEnabled(True)
+        else:
+            # No KBs available
+            self.show_documents(None, [])
             self.add_doc_btn.setEnabled(False)
             self.batch_convert_btn.setEnabled(False)
     
@@ -186,7 +445,7 @@ class PDFManagementDialog(QDialog):
             self.add_doc_btn.setEnabled(True)
             self.batch_convert_btn.setEnabled(True)
         else:
-            self.document_list.clear()
+            self.show_documents(None, [])
             self.add_doc_btn.setEnabled(False)
             self.batch_convert_btn.setEnabled(False)
     
@@ -196,32 +455,30 @@ class PDFManagementDialog(QDialog):
         if not kb_name:
             return
         
-        # Clear previous document list
-        self.document_list.clear()
-        self.document_widgets = {}
-        
         # Get documents for current KB
-        documents = self.llm_processor.get_kb_documents(kb_name)
-        
-        for doc in documents:
-            # Create list item
-            item = QListWidgetItem()
-            item.setSizeHint(QSize(self.document_list.width(), 80))  # Height depends on content
-            
-            # Create widget for document display
-            doc_widget = DocumentListItem(doc)
-            # Connect convert button if exists
-            if hasattr(doc_widget, "convert_btn"):
-                doc_widget.convert_btn.clicked.connect(
-                    lambda checked, doc_id=doc["id"]: self.start_conversion(doc_id)
-                )
-            
-            # Store widget reference
-            self.document_widgets[doc["id"]] = doc_widget
-            
-            # Add to list
-            self.document_list.addItem(item)
-            self.document_list.setItemWidget(item, doc_widget)
+        self.show_documents(kb_name, self.llm_processor.get_kb_documents(kb_name))
+    
+    def show_documents(self, kb_name, documents):
+        """Show a KB's documents, updating rows in place if it is already shown"""
+        if kb_name is not None and kb_name == self._shown_kb:
+            self.document_model.sync_documents(documents)
+        else:
+            # Different KB: nothing to diff against
+            self.document_model.set_documents(documents)
+        self._shown_kb = kb_name
+    
+    def _select_documents(self, start_dir):
+        """Let the user pick PDF files, returning their paths (empty if cancelled)"""
+        dialog = QFileDialog(self, "Select PDF Documents", start_dir, "PDF Files (*.pdf)")
+        dialog.setFileMode(QFileDialog.FileMode.ExistingFiles)
+        # Native pickers can stall on huge directories; there, use Qt's own
+        # dialog so the plain icon provider above is actually used
+        if _is_large_directory(start_dir):
+            dialog.setOption(QFileDialog.Option.DontUseNativeDialog)
+            dialog.setIconProvider(self._icon_provider)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return []
+        return dialog.selectedFiles()
     
     def on_add_kb_clicked(self):
         """Handle add knowledge base button click"""
@@ -232,6 +489,8 @@ class PDFManagementDialog(QDialog):
             success = self.llm_processor.create_kb(kb_name)
             
             if success:
+                self.kbCreated.emit(kb_name)
+                
                 # Refresh KB list
                 self.load_knowledge_bases()
                 # Select the new KB
@@ -247,13 +506,16 @@ class PDFManagementDialog(QDialog):
         if not kb_name:
             return
         
-        # Open file dialog to select PDFs
-        files, _ = QFileDialog.getOpenFileNames(
-            self, "Select PDF Documents", "", "PDF Files (*.pdf)"
-        )
+        # Open file dialog to select PDFs. Starting it in a known directory
+        # keeps it from listing the whole working or home directory first
+        start_dir = (self._last_doc_dir
+                     or self.llm_processor.get_kb_directory(kb_name)
+                     or os.path.expanduser("~"))
+        files = self._select_documents(start_dir)
         
         if not files:
             return
+        self._last_doc_dir = os.path.dirname(files[0])
         
         # Ask if these are scanned documents
         is_scanned = QMessageBox.question(
@@ -262,12 +524,10 @@ class PDFManagementDialog(QDialog):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         ) == QMessageBox.StandardButton.Yes
         
-        # Add documents to KB
-        added_docs = []
-        for file_path in files:
-            doc_id = self.llm_processor.add_document_to_kb(kb_name, file_path, is_scanned)
-            if doc_id:
-                added_docs.append(doc_id)
+        # Add documents to KB in one batch
+        added_docs = self.llm_processor.add_documents_to_kb(kb_name, files, is_scanned)
+        if added_docs:
+            self.documentsChanged.emit()
         
         # Refresh document list
         self.refresh_document_list()
@@ -284,6 +544,7 @@ class PDFManagementDialog(QDialog):
                 for doc_id in added_docs:
                     self.start_conversion(doc_id)
     
+    @pyqtSlot(int)
     def start_conversion(self, doc_id):
         """Start conversion for a specific document"""
         # Get document info
@@ -296,94 +557,128 @@ class PDFManagementDialog(QDialog):
         if not kb:
             return
         
-        # Set up output directory
-        output_dir = os.path.join(kb["directory"], "converted")
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        self._start_worker(doc_id, doc["original_path"], kb["directory"])
+    
+    def _start_worker(self, doc_id, original_path, kb_directory):
+        """
+        Queue a document for conversion; the worker stores its in_progress
+        status once the pool actually runs it
+        """
+        # Clicking Convert on a document still waiting for a free thread
+        # must not queue it twice
+        if doc_id in self._active_doc_ids:
+            return
+        self._active_doc_ids.add(doc_id)
         
-        # Update status to in_progress
-        self.llm_processor.update_document_conversion(doc_id, "in_progress", progress=0)
-        if doc_id in self.document_widgets:
-            self.document_widgets[doc_id].update_status("in_progress", 0)
+        # Set up output directory
+        output_dir = os.path.join(kb_directory, "converted")
+        if output_dir not in self._ensured_dirs:
+            os.makedirs(output_dir, exist_ok=True)
+            self._ensured_dirs.add(output_dir)
         
         # Create worker for conversion
-        worker = PDFConversionWorker(doc_id, doc["original_path"], output_dir)
+        # The worker stores its own progress through the background writer,
+        # so progress signals only have to repaint
+        worker = PDFConversionWorker(doc_id, original_path, output_dir,
+                                     db_manager=self._db_writer)
         
-        # Connect signals
-        worker.signals.progress.connect(self.on_conversion_progress)
-        worker.signals.completed.connect(self.on_conversion_completed)
-        worker.signals.error.connect(self.on_conversion_error)
+        # Connect signals. Always queued, so handlers run from the event
+        # loop even if a worker happens to emit on the UI thread
+        self._connect_worker_signals(worker)
         
         # Start conversion
         self.thread_pool.start(worker)
     
+    def _connect_worker_signals(self, worker):
+        """Deliver a worker's started/progress/completed/error signals through the event queue"""
+        queued = Qt.ConnectionType.QueuedConnection
+        worker.signals.started.connect(self.on_conversion_started, queued)
+        worker.signals.progress.connect(self.on_conversion_progress, queued)
+        worker.signals.completed.connect(self.on_conversion_completed, queued)
+        worker.signals.error.connect(self.on_conversion_error, queued)
+    
     def on_batch_convert_clicked(self):
-        """Start batch conversion for all pending documents"""
+        """Start conversion for all pending documents of the current KB"""
         # Get current KB
         kb_name = self.kb_combo.currentText()
         if not kb_name:
             return
         
-        # Create batch worker
-        base_dir = os.path.dirname(self.llm_processor.base_dir)
-        worker = BatchConversionWorker(self.llm_processor.db_manager, base_dir)
-        
-        # Connect signals
-        worker.signals.progress.connect(self.on_conversion_progress)
-        worker.signals.completed.connect(self.on_conversion_completed)
-        worker.signals.error.connect(self.on_conversion_error)
+        # One query returns every document with its KB directory, so no
+        # per-document lookups are needed to start the workers
+        rows = self.llm_processor.db_manager.get_pending_conversions_with_kb(kb_name)
+        if not rows:
+            return
         
-        # Start batch processing
-        self.thread_pool.start(worker)
+        # Each document only turns in_progress once a pool thread picks it
+        # up; until then it stays pending (or failed)
+        for row in rows:
+            self._start_worker(row["id"], row["original_path"], row["directory"])
     
+    @pyqtSlot(int)
+    def on_conversion_started(self, doc_id):
+        """Handle a queued conversion being picked up by the thread pool"""
+        self.document_model.update_doc(doc_id, "in_progress", 0)
+    
+    @pyqtSlot(int, float)
     def on_conversion_progress(self, doc_id, progress):
         """Handle conversion progress update"""
-        # Update database
-        self.llm_processor.update_document_conversion(doc_id, "in_progress", progress=progress)
+        # Documents of another KB (or a KB no longer shown) have nothing
+        # to repaint
+        if not self.document_model.has_doc(doc_id):
+            return
         
-        # Update UI
-        if doc_id in self.document_widgets:
-            self.document_widgets[doc_id].update_progress(progress)
+        # Only remember the latest value; _flush_progress applies it
+        self._pending_progress[doc_id] = progress
+        if not self._progress_timer.isActive():
+            self._progress_timer.start()
+    
+    def _flush_progress(self):
+        """Show all progress collected since the last flush"""
+        pending, self._pending_progress = self._pending_progress, {}
+        for doc_id, progress in pending.items():
+            self.document_model.update_doc(doc_id, progress=progress)
+    
+    @pyqtSlot()
+    def _on_final_state_stored(self):
+        """Announce a stored final conversion state"""
+        # Written in the background, so cached document lists are not
+        # dropped by LLMProcessor itself. Doing it only now keeps a refresh
+        # in the meantime from caching the row as still in_progress.
+        self.llm_processor.invalidate_cache()
+        self.documentsChanged.emit()
     
+    @pyqtSlot(int, str, int)
     def on_conversion_completed(self, doc_id, output_path, page_count):
         """Handle conversion completion"""
+        self._active_doc_ids.discard(doc_id)
+        # A not yet flushed progress value must not overwrite the final state
+        self._pending_progress.pop(doc_id, None)
+        
         # Update database
-        self.llm_processor.update_document_conversion(
+        self._db_writer.update_document_conversion(
             doc_id, "completed", progress=100,
-            converted_path=output_path, page_count=page_count
+            converted_path=output_path, page_count=page_count,
+            on_applied=self._finalStateStored.emit
         )
         
         # Update UI
-        if doc_id in self.document_widgets:
-            self.document_widgets[doc_id].update_status("completed", 100)
+        self.document_model.update_doc(doc_id, "completed", 100, page_count)
     
+    @pyqtSlot(int, str)
     def on_conversion_error(self, doc_id, error_msg):
         """Handle conversion error"""
+        self._active_doc_ids.discard(doc_id)
+        self._pending_progress.pop(doc_id, None)
+        
         # Update database
-        self.llm_processor.update_document_conversion(doc_id, "failed", progress=0)
+        self._db_writer.update_document_conversion(
+            doc_id, "failed", progress=0, on_applied=self._finalStateStored.emit
+        )
         
         # Update UI
-        if doc_id in self.document_widgets:
-            self.document_widgets[doc_id].update_status("failed", 0)
+        self.document_model.update_doc(doc_id, "failed", 0)
         
         # Show error message
         QMessageBox.warning(self, "Conversion Error", f"Error converting document: {error_msg}")
 
-
-class QComboBox(QComboBox):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-
-
-class QInputDialog:
-    @staticmethod
-    def getText(parent, title, label):
-        from PyQt6.QtWidgets import QInputDialog
-        return QInputDialog.getText(parent, title, label)
-
-
-class QFileDialog:
-    @staticmethod
-    def getOpenFileNames(parent, caption, directory, filter):
-        from PyQt6.QtWidgets import QFileDialog
-        return QFileDialog.getOpenFileNames(parent, caption, directory, filter)
@@ -0,0 +1,220 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import db_manager
+from db_manager import DBManager, QueuedDBWriter, SCHEMA_VERSION
+
+# Schema as created before versioning: messages keyed by the TEXT
+# conversation_id, and foreign keys not enforced
+BASELINE_SCHEMA = '''
+    CREATE TABLE knowledge_bases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        directory TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE documents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kb_id INTEGER NOT NULL,
+        original_filename TEXT NOT NULL,
+        original_path TEXT NOT NULL,
+        converted_path TEXT,
+        is_scanned BOOLEAN DEFAULT FALSE,
+        conversion_status TEXT DEFAULT 'pending',
+        conversion_progress REAL DEFAULT 0,
+        page_count INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (kb_id) REFERENCES knowledge_bases(id) ON DELETE CASCADE
+    );
+    CREATE TABLE conversations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        conversation_id TEXT UNIQUE NOT NULL,
+        data_element TEXT NOT NULL,
+        procedure TEXT NOT NULL,
+        kb_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (kb_id) REFERENCES knowledge_bases(id) ON DELETE CASCADE
+    );
+    CREATE TABLE messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        conversation_id TEXT NOT NULL,
+        is_user BOOLEAN NOT NULL,
+        message TEXT NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (conversation_id) REFERENCES conversations(conversation_id) ON DELETE CASCADE
+    );
+
+    INSERT INTO knowledge_bases (name, directory) VALUES ('kb', 'uploads/kb');
+    INSERT INTO conversations (conversation_id, data_element, procedure, kb_id)
+        VALUES ('conv-1', 'element', 'procedure', 1);
+    INSERT INTO messages (conversation_id, is_user, message, timestamp) VALUES
+        ('conv-1', 1, 'question', '2024-01-01 10:00:00'),
+        ('conv-1', 0, 'answer', '2024-01-01 10:00:01'),
+        ('missing', 1, 'orphan', '2024-01-01 11:00:00');
+'''
+
+
+class MessagesMigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "app_data.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(BASELINE_SCHEMA)
+        conn.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_baseline_database_is_migrated(self):
+        with self.assertLogs("db_manager", level="WARNING") as logs:
+            db = DBManager(self.db_path)
+        try:
+            messages = db.get_conversation_messages("conv-1")
+            self.assertEqual([m["message"] for m in messages], ["question", "answer"])
+            self.assertIn("Keeping 1 message(s)", logs.output[0])
+
+            version = db._write_conn.execute("PRAGMA user_version").fetchone()[0]
+            self.assertEqual(version, SCHEMA_VERSION)
+            orphaned = db._write_conn.execute(
+                "SELECT conversation_id, message FROM messages_orphaned"
+            ).fetchall()
+            self.assertEqual([tuple(row) for row in orphaned], [("missing", "orphan")])
+        finally:
+            db.close()
+
+    def test_old_table_is_dropped_without_orphans(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM messages WHERE conversation_id = 'missing'")
+        conn.commit()
+        conn.close()
+
+        db = DBManager(self.db_path)
+        try:
+            tables = {row[0] for row in db._write_conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )}
+            self.assertNotIn("messages_v1", tables)
+            self.assertNotIn("messages_orphaned", tables)
+            self.assertEqual(len(db.get_conversation_messages("conv-1")), 2)
+        finally:
+            db.close()
+
+
+class BulkInsertTest(unittest.TestCase):
+    def test_add_documents_bulk_returns_ids_in_input_order(self):
+        db = DBManager(":memory:")
+        try:
+            kb_id = db.add_knowledge_base("kb", "uploads/kb")
+            names = ["c.pdf", "a.pdf", "b.pdf"]
+            doc_ids = db.add_documents_bulk(kb_id, [(name, name, True) for name in names])
+            self.assertEqual(
+                [db.get_document_by_id(doc_id)["original_filename"] for doc_id in doc_ids],
+                names
+            )
+        finally:
+            db.close()
+
+
+class ProgressBufferTest(unittest.TestCase):
+    def setUp(self):
+        # Keep the background flusher from writing while a test inspects
+        # the buffer
+        patcher = mock.patch.object(db_manager, "PROGRESS_FLUSH_INTERVAL", 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db = DBManager(":memory:")
+        self.addCleanup(self.db.close)
+        kb_id = self.db.add_knowledge_base("kb", "uploads/kb")
+        self.kb_id = kb_id
+        self.doc_id = self.db.add_document(kb_id, "a.pdf", "a.pdf", True)
+
+    def stored_progress(self):
+        return self.db._write_conn.execute(
+            "SELECT conversion_progress FROM documents WHERE id = ?", (self.doc_id,)
+        ).fetchone()[0]
+
+    def test_ticks_are_buffered_and_coalesced_by_flush(self):
+        self.db.update_document_conversion(self.doc_id, "in_progress", progress=0)
+        for progress in (10, 20, 30):
+            self.db.update_document_conversion(self.doc_id, "in_progress", progress=progress)
+        self.assertEqual(self.stored_progress(), 0)
+        self.assertEqual(self.db._progress_buf, {self.doc_id: ("in_progress", 30)})
+
+        self.db.flush_progress()
+        self.assertEqual(self.stored_progress(), 30)
+        self.assertEqual(self.db._progress_buf, {})
+
+    def test_buffered_progress_is_visible_to_readers(self):
+        self.db.update_document_conversion(self.doc_id, "in_progress", progress=0)
+        self.db.update_document_conversion(self.doc_id, "in_progress", progress=42)
+        docs = self.db.get_documents_by_kb(self.kb_id)
+        self.assertEqual(docs[0]["conversion_progress"], 42)
+        self.assertEqual(self.db.get_document_progress(self.doc_id), 42)
+
+    def test_status_change_supersedes_buffered_tick(self):
+        self.db.update_document_conversion(self.doc_id, "in_progress", progress=0)
+        self.db.update_document_conversion(self.doc_id, "in_progress", progress=50)
+        self.db.update_document_conversion(self.doc_id, "completed", progress=100, page_count=3)
+        self.db.flush_progress()
+        doc = self.db.get_document_by_id(self.doc_id)
+        self.assertEqual(doc["conversion_status"], "completed")
+        self.assertEqual(doc["conversion_progress"], 100)
+
+
+class RecordingDBManager:
+    """Stands in for DBManager and records what QueuedDBWriter writes"""
+    def __init__(self):
+        self.updates = []
+        self.bulk_updates = []
+
+    def update_document_conversion(self, *update):
+        self.updates.append(update)
+
+    def update_document_conversion_bulk(self, updates):
+        self.bulk_updates.append(list(updates))
+
+
+def queued(doc_id, status, progress=None, converted_path=None, page_count=None):
+    return (doc_id, status, progress, converted_path, page_count, None)
+
+
+class QueuedDBWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.db = RecordingDBManager()
+        self.writer = QueuedDBWriter(self.db)
+        self.addCleanup(self.writer.close)
+
+    def test_superseded_ticks_are_dropped(self):
+        self.writer._apply([
+            queued(1, "in_progress", 10),
+            queued(2, "in_progress", 5),
+            queued(1, "in_progress", 20),
+            queued(2, "completed", 100, "out.pdf", 4),
+        ])
+        self.assertEqual(self.db.updates, [(2, "completed", 100, "out.pdf", 4)])
+        self.assertEqual(self.db.bulk_updates, [[(1, 20)]])
+
+    def test_no_tick_after_final_status(self):
+        self.writer._apply([queued(1, "failed", 0)])
+        self.writer._apply([queued(1, "in_progress", 30)])
+        self.assertEqual(self.db.updates, [(1, "failed", 0, None, None)])
+        self.assertEqual(self.db.bulk_updates, [])
+
+        # A status-only in_progress update starts a new attempt
+        self.writer._apply([queued(1, "in_progress"), queued(1, "in_progress", 5)])
+        self.assertEqual(self.db.bulk_updates, [[(1, 5)]])
+
+    def test_on_applied_runs_after_the_write(self):
+        calls = []
+        self.writer.update_document_conversion(
+            1, "completed", progress=100, on_applied=lambda: calls.append(list(self.db.updates))
+        )
+        self.writer.close()
+        self.assertEqual(calls, [[(1, "completed", 100, None, None)]])
+
+
+if __name__ == "__main__":
+    unittest.main()